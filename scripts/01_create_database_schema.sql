@@ -73,12 +73,12 @@ CREATE TABLE user_sessions (
 -- Patients table with POLMED integration
 CREATE TABLE patients (
     id INT PRIMARY KEY AUTO_INCREMENT,
-    medical_aid_number VARCHAR(50) UNIQUE,
+    medical_aid_number VARCHAR(50),
     first_name VARCHAR(100) NOT NULL,
     last_name VARCHAR(100) NOT NULL,
     date_of_birth DATE,
     gender ENUM('Male', 'Female', 'Other') NOT NULL,
-    id_number VARCHAR(20) UNIQUE,
+    id_number VARCHAR(20),
     phone_number VARCHAR(20),
     email VARCHAR(255),
     physical_address TEXT,
@@ -93,6 +93,8 @@ CREATE TABLE patients (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (created_by) REFERENCES users(id),
+    UNIQUE KEY uq_patients_medical_aid (medical_aid_number),
+    UNIQUE KEY uq_patients_id_number (id_number),
     INDEX idx_patients_medical_aid (medical_aid_number),
     INDEX idx_patients_id_number (id_number),
     INDEX idx_patients_name (last_name, first_name),
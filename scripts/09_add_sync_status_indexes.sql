@@ -0,0 +1,12 @@
+-- Migration: covering index for the offline sync status summary
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/sync/status filters on user_id (optionally device_id), groups by
+-- table_name and aggregates sync_status and server_timestamp. With every
+-- referenced column in the index the summary is answered from the index
+-- alone (EXPLAIN shows "Using index") instead of reading table rows.
+-- idx_sync_status_device (06) already covers device_id-first lookups.
+CREATE INDEX idx_sync_user_device_table
+  ON sync_status (user_id, device_id, table_name, sync_status, server_timestamp);
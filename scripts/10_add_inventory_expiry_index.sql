@@ -0,0 +1,13 @@
+-- Migration: equality-first index for inventory expiry alerts
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/inventory/alerts/expiry filters on status = 'Active', an
+-- expiry_date range and quantity_current > 0. idx_inventory_expiry_status
+-- (06) leads with expiry_date, so the range scan also walks every
+-- Expired/Disposed batch in the window. With status first the scan covers
+-- only active batches, and quantity_current is checked from the index
+-- (index condition pushdown) before any row is read.
+CREATE INDEX idx_stock_status_expiry
+  ON inventory_stock (status, expiry_date, quantity_current);
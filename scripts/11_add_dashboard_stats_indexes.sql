@@ -0,0 +1,29 @@
+-- Migration: composite indexes for the role dashboard counters
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/dashboard/stats counts each user's own rows over the last
+-- 7/30 days. The queries filter on (owner column, timestamp range), so an
+-- index on exactly that pair turns each counter into a short range scan
+-- instead of reading every row the user ever created. The single-column
+-- owner indexes from 01 remain for foreign keys.
+
+-- Clerk: registrations
+CREATE INDEX idx_patients_created_by_date ON patients (created_by, created_at);
+
+-- Clerk: bookings (status = 'Booked' and a booked_at range)
+CREATE INDEX idx_appointments_status_booked ON appointments (status, booked_at);
+
+-- Nurse: vital signs recorded
+CREATE INDEX idx_vitals_recorded_by_date ON vital_signs (recorded_by, recorded_at);
+
+-- Nurse/doctor/social worker: notes by type; visit_id makes the
+-- COUNT(DISTINCT visit_id) counters index-only
+CREATE INDEX idx_notes_author_type_date ON clinical_notes (created_by, note_type, created_at, visit_id);
+
+-- Social worker: referrals created
+CREATE INDEX idx_ref_created_by_date ON referrals (created_by, created_at);
+
+-- Completed workflows this month
+CREATE INDEX idx_workflow_user_completed ON visit_workflow_progress (assigned_user_id, is_completed, completed_at);
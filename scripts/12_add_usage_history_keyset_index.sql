@@ -0,0 +1,11 @@
+-- Migration: keyset pagination index for inventory usage history
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/inventory/usage/history?cursor=... pages newest-first on
+-- (usage_date, usage_time, id) and seeks past the previous page's last
+-- row. With all three columns in one index each page is a short backward
+-- range scan from the cursor, however deep the client has paged.
+CREATE INDEX idx_usage_date_time_id
+  ON inventory_usage (usage_date, usage_time, id);
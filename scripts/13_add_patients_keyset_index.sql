@@ -0,0 +1,10 @@
+-- Migration: keyset pagination index for the patient list
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/patients?cursor=... pages newest-first on (created_at, id) and
+-- seeks past the previous page's last patient. MySQL reads an ascending
+-- index backwards for the DESC order, so each page is a short range scan
+-- from the cursor instead of an OFFSET that discards every earlier row.
+CREATE INDEX idx_patients_created_id ON patients (created_at, id);
@@ -0,0 +1,97 @@
+-- Migration: denormalized visit statistics per patient
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/patients used to LEFT JOIN patient_visits and GROUP BY p.id
+-- on every page to report each patient's visit count and latest visit.
+-- The two values are now kept in patient_visit_stats by the triggers below,
+-- so the list is a plain read of patients that can walk
+-- idx_patients_created_id (13) in order, with one primary key lookup here
+-- per returned patient.
+-- They live in their own 1:1 table rather than on patients: updating the
+-- patient row on every visit would fire tr_patients_audit_update (04),
+-- writing an empty 'UPDATE' entry to the POPI audit log, and bump
+-- patients.updated_at, so patients would look edited whenever a visit is
+-- booked.
+CREATE TABLE IF NOT EXISTS patient_visit_stats (
+    patient_id INT PRIMARY KEY,
+    total_visits INT NOT NULL DEFAULT 0,
+    last_visit_date DATE NULL,
+    FOREIGN KEY (patient_id) REFERENCES patients(id) ON DELETE CASCADE
+);
+
+-- An earlier revision of this migration kept the counters on patients;
+-- drop those columns where they were added
+SET @ddl = IF(
+    (SELECT COUNT(*) FROM information_schema.columns
+     WHERE table_schema = DATABASE() AND table_name = 'patients'
+       AND column_name IN ('total_visits', 'last_visit_date')) = 2,
+    'ALTER TABLE patients DROP COLUMN total_visits, DROP COLUMN last_visit_date',
+    'SELECT ''patients has no visit stats columns'' AS note'
+);
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Backfill from existing visits
+INSERT INTO patient_visit_stats (patient_id, total_visits, last_visit_date)
+SELECT patient_id, COUNT(*), MAX(visit_date)
+FROM patient_visits
+GROUP BY patient_id
+ON DUPLICATE KEY UPDATE
+    total_visits = VALUES(total_visits),
+    last_visit_date = VALUES(last_visit_date);
+
+DELIMITER //
+
+DROP TRIGGER IF EXISTS tr_patient_visits_stats_insert//
+CREATE TRIGGER tr_patient_visits_stats_insert
+AFTER INSERT ON patient_visits
+FOR EACH ROW
+BEGIN
+    INSERT INTO patient_visit_stats (patient_id, total_visits, last_visit_date)
+    VALUES (NEW.patient_id, 1, NEW.visit_date)
+    ON DUPLICATE KEY UPDATE
+        total_visits = total_visits + 1,
+        last_visit_date = GREATEST(COALESCE(last_visit_date, NEW.visit_date), NEW.visit_date);
+END//
+
+-- A deleted visit may have been the latest one, so the date is recomputed
+-- from that patient's remaining visits (idx_visits_patient)
+DROP TRIGGER IF EXISTS tr_patient_visits_stats_delete//
+CREATE TRIGGER tr_patient_visits_stats_delete
+AFTER DELETE ON patient_visits
+FOR EACH ROW
+BEGIN
+    UPDATE patient_visit_stats
+    SET total_visits = GREATEST(total_visits - 1, 0),
+        last_visit_date = (SELECT MAX(visit_date) FROM patient_visits WHERE patient_id = OLD.patient_id)
+    WHERE patient_id = OLD.patient_id;
+END//
+
+-- Only visits that move between patients or change date affect the stats
+DROP TRIGGER IF EXISTS tr_patient_visits_stats_update//
+CREATE TRIGGER tr_patient_visits_stats_update
+AFTER UPDATE ON patient_visits
+FOR EACH ROW
+BEGIN
+    IF NEW.patient_id <> OLD.patient_id THEN
+        UPDATE patient_visit_stats
+        SET total_visits = GREATEST(total_visits - 1, 0),
+            last_visit_date = (SELECT MAX(visit_date) FROM patient_visits WHERE patient_id = OLD.patient_id)
+        WHERE patient_id = OLD.patient_id;
+
+        INSERT INTO patient_visit_stats (patient_id, total_visits, last_visit_date)
+        VALUES (NEW.patient_id, 1, NEW.visit_date)
+        ON DUPLICATE KEY UPDATE
+            total_visits = total_visits + 1,
+            last_visit_date = GREATEST(COALESCE(last_visit_date, NEW.visit_date), NEW.visit_date);
+    ELSEIF NEW.visit_date <> OLD.visit_date THEN
+        UPDATE patient_visit_stats
+        SET last_visit_date = (SELECT MAX(visit_date) FROM patient_visits WHERE patient_id = NEW.patient_id)
+        WHERE patient_id = NEW.patient_id;
+    END IF;
+END//
+
+DELIMITER ;
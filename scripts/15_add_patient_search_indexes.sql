@@ -0,0 +1,64 @@
+-- Migration: indexes for patient search, province filtering and uniqueness
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- GET /api/patients searches names and medical aid numbers by substring.
+-- LIKE '%term%' cannot use a B-tree index and read every patient; terms of
+-- three or more characters are now matched as a phrase against this ngram
+-- FULLTEXT index. The ngram parser drops any token containing a stopword
+-- (e.g. every bigram with an 'a'), so stopwords are disabled for the
+-- index build.
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX ft_patients_search
+  ON patients (first_name, last_name, medical_aid_number) WITH PARSER ngram;
+SET SESSION innodb_ft_enable_stopword = ON;
+
+-- Doctors only see patients in their assigned provinces
+CREATE INDEX idx_patients_province ON patients (province, created_at, id);
+
+-- create_patient relies on id_number and medical_aid_number being unique and
+-- tells the two apart by key name (uq_patients_id_number,
+-- uq_patients_medical_aid, as declared in 01). Older databases got
+-- column-level UNIQUE keys named after the column, or none at all. For each
+-- column, information_schema.statistics is checked: a single-column unique
+-- key is renamed, a missing one is added, and a correctly named one is left
+-- alone, so this can be run more than once. Adding a key fails if the
+-- column already holds duplicates; merge those patients first.
+SET @id_number_key = (
+    SELECT index_name FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'patients' AND non_unique = 0
+    GROUP BY index_name
+    HAVING COUNT(*) = 1 AND MAX(column_name) = 'id_number'
+    ORDER BY index_name = 'uq_patients_id_number' DESC
+    LIMIT 1
+);
+SET @ddl = CASE
+    WHEN @id_number_key = 'uq_patients_id_number'
+        THEN 'SELECT ''uq_patients_id_number already present'' AS note'
+    WHEN @id_number_key IS NOT NULL
+        THEN CONCAT('ALTER TABLE patients RENAME INDEX `', @id_number_key, '` TO uq_patients_id_number')
+    ELSE 'ALTER TABLE patients ADD UNIQUE INDEX uq_patients_id_number (id_number)'
+END;
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @medical_aid_key = (
+    SELECT index_name FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'patients' AND non_unique = 0
+    GROUP BY index_name
+    HAVING COUNT(*) = 1 AND MAX(column_name) = 'medical_aid_number'
+    ORDER BY index_name = 'uq_patients_medical_aid' DESC
+    LIMIT 1
+);
+SET @ddl = CASE
+    WHEN @medical_aid_key = 'uq_patients_medical_aid'
+        THEN 'SELECT ''uq_patients_medical_aid already present'' AS note'
+    WHEN @medical_aid_key IS NOT NULL
+        THEN CONCAT('ALTER TABLE patients RENAME INDEX `', @medical_aid_key, '` TO uq_patients_medical_aid')
+    ELSE 'ALTER TABLE patients ADD UNIQUE INDEX uq_patients_medical_aid (medical_aid_number)'
+END;
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,64 @@
+-- Migration: single-call visit creation
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+DELIMITER //
+
+-- POST /api/patients/<id>/visits used to look up the route's province,
+-- check it against the user's provinces and only then insert the visit,
+-- one round trip each. This procedure does all three on the server and
+-- answers with a single row:
+--   result    'SUCCESS' or 'FORBIDDEN' (route outside the allowed provinces)
+--   visit_id  the new patient_visits.id on success
+--   province  the effective province (the route's province when forbidden)
+-- The effective province is the route's, else the first allowed province,
+-- else p_fallback_province (the caller's cached default_province setting).
+DROP PROCEDURE IF EXISTS sp_create_patient_visit//
+CREATE PROCEDURE sp_create_patient_visit(
+    IN p_patient_id INT,
+    IN p_visit_date DATE,
+    IN p_visit_time TIME,
+    IN p_route_id INT,
+    IN p_location VARCHAR(255),
+    IN p_chief_complaint TEXT,
+    IN p_created_by INT,
+    IN p_allowed_provinces JSON,
+    IN p_fallback_province VARCHAR(50)
+)
+BEGIN
+    DECLARE v_route_province VARCHAR(50) DEFAULT NULL;
+    DECLARE v_province VARCHAR(50);
+
+    IF p_route_id IS NOT NULL THEN
+        SELECT province INTO v_route_province
+        FROM routes
+        WHERE id = p_route_id;
+    END IF;
+
+    IF v_route_province IS NOT NULL
+       AND JSON_LENGTH(COALESCE(p_allowed_provinces, JSON_ARRAY())) > 0
+       AND NOT JSON_CONTAINS(p_allowed_provinces, JSON_QUOTE(v_route_province)) THEN
+        SELECT 'FORBIDDEN' AS result, NULL AS visit_id, v_route_province AS province;
+    ELSE
+        SET v_province = COALESCE(
+            v_route_province,
+            JSON_UNQUOTE(JSON_EXTRACT(p_allowed_provinces, '$[0]')),
+            p_fallback_province
+        );
+
+        -- Without an explicit location, use a generic one ending in the
+        -- province, which tr_validate_user_geographic_access expects
+        INSERT INTO patient_visits (
+            patient_id, visit_date, visit_time, route_id, location, chief_complaint, current_stage_id, created_by
+        ) VALUES (
+            p_patient_id, p_visit_date, p_visit_time, p_route_id,
+            COALESCE(p_location, CONCAT('Clinic Visit, ', v_province)),
+            p_chief_complaint, NULL, p_created_by
+        );
+
+        SELECT 'SUCCESS' AS result, LAST_INSERT_ID() AS visit_id, v_province AS province;
+    END IF;
+END//
+
+DELIMITER ;
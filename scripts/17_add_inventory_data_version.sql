@@ -0,0 +1,118 @@
+-- Migration: shared inventory data version for report caching
+-- Run this against an existing MySQL palmed_clinic_erp database
+
+USE palmed_clinic_erp;
+
+-- The inventory valuation and turnover reports are cached per app worker,
+-- keyed by this version. It used to be a counter in each worker's memory, so
+-- a stock change made through one worker left the others serving stale
+-- reports. The counter now lives in this one-row table and is bumped by the
+-- triggers below in the same transaction as the write, so every worker (and
+-- writes made outside the app) invalidate the same way.
+CREATE TABLE IF NOT EXISTS inventory_data_version (
+    id TINYINT UNSIGNED PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO inventory_data_version (id, version) VALUES (1, 0);
+
+DELIMITER //
+
+-- consumable_categories supplies category_name in both reports
+DROP TRIGGER IF EXISTS tr_consumable_categories_version_insert//
+CREATE TRIGGER tr_consumable_categories_version_insert
+AFTER INSERT ON consumable_categories
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_consumable_categories_version_update//
+CREATE TRIGGER tr_consumable_categories_version_update
+AFTER UPDATE ON consumable_categories
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_consumable_categories_version_delete//
+CREATE TRIGGER tr_consumable_categories_version_delete
+AFTER DELETE ON consumable_categories
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_consumables_version_insert//
+CREATE TRIGGER tr_consumables_version_insert
+AFTER INSERT ON consumables
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_consumables_version_update//
+CREATE TRIGGER tr_consumables_version_update
+AFTER UPDATE ON consumables
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_consumables_version_delete//
+CREATE TRIGGER tr_consumables_version_delete
+AFTER DELETE ON consumables
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_inventory_stock_version_insert//
+CREATE TRIGGER tr_inventory_stock_version_insert
+AFTER INSERT ON inventory_stock
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_inventory_stock_version_update//
+CREATE TRIGGER tr_inventory_stock_version_update
+AFTER UPDATE ON inventory_stock
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_inventory_stock_version_delete//
+CREATE TRIGGER tr_inventory_stock_version_delete
+AFTER DELETE ON inventory_stock
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_inventory_usage_version_insert//
+CREATE TRIGGER tr_inventory_usage_version_insert
+AFTER INSERT ON inventory_usage
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_inventory_usage_version_update//
+CREATE TRIGGER tr_inventory_usage_version_update
+AFTER UPDATE ON inventory_usage
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DROP TRIGGER IF EXISTS tr_inventory_usage_version_delete//
+CREATE TRIGGER tr_inventory_usage_version_delete
+AFTER DELETE ON inventory_usage
+FOR EACH ROW
+BEGIN
+    UPDATE inventory_data_version SET version = version + 1 WHERE id = 1;
+END//
+
+DELIMITER ;
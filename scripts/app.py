@@ -1,24 +1,51 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, Response, request, jsonify, session, stream_with_context, g, has_app_context, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode, pooling
+from mysql.connector.errors import IntegrityError, PoolError
+from cachetools import TTLCache
 import jwt
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, time as dt_time, timedelta, timezone
 from functools import wraps
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import atexit
 import os
+import re
+import sys
 import logging
+import queue
+import multiprocessing
+import threading
+import time
 from typing import Dict, List, Optional, Tuple
 import uuid
+import base64
+import hashlib
+import hmac
 import json 
-from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (set LOG_LEVEL=WARNING in production)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'palmed-clinic-secret-key-2025')
+# Number of reverse proxies in front of the app whose X-Forwarded-* headers
+# are trusted. Behind a proxy, remote_addr would otherwise be the proxy's
+# address for every client (login rate limits, audit log). Leave at 0 when
+# the app is reached directly, or clients could spoof their address.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(
+        app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS,
+        x_host=TRUSTED_PROXY_HOPS
+    )
 # Allow CORS from configured frontends (comma-separated) or common localhost defaults
 frontend_origins = os.environ.get('FRONTEND_ORIGINS')
 if frontend_origins:
@@ -34,25 +61,100 @@ CORS(
     methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
 )
 
+# Preflights from allowed origins are answered before routing with fixed
+# headers; flask-cors skips responses that already carry CORS headers. The
+# max-age lets browsers reuse a preflight result instead of repeating it
+# before every API call.
+CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 86400))
+_allowed_origin_set = frozenset(allowed_origins)
+_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, PATCH, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Max-Age': str(CORS_MAX_AGE),
+    'Vary': 'Origin',
+}
+
+@app.before_request
+def answer_cors_preflight():
+    if request.method != 'OPTIONS' or 'Access-Control-Request-Method' not in request.headers:
+        return None
+    origin = request.headers.get('Origin')
+    if origin not in _allowed_origin_set:
+        return None
+    return '', 204, {'Access-Control-Allow-Origin': origin, **_PREFLIGHT_HEADERS}
+
 # Utilities
-def _to_jsonable(obj):
-    try:
-        from datetime import datetime as _dt_datetime, date as _dt_date, time as _dt_time, timedelta as _dt_timedelta
-        if isinstance(obj, (_dt_datetime, _dt_date, _dt_time)):
-            return obj.isoformat()
-        if isinstance(obj, _dt_timedelta):
-            total_seconds = int(obj.total_seconds())
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-    except Exception:
-        pass
-    if isinstance(obj, dict):
-        return {k: _to_jsonable(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [_to_jsonable(v) for v in obj]
-    return obj
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+def validate_email(email: str) -> bool:
+    """Cheap structural email check; the '@' test rejects most junk before the regex runs"""
+    if '@' not in email:
+        return False
+    return _EMAIL_RE.match(email) is not None
+
+def _format_timedelta(value: timedelta) -> str:
+    """Render a MySQL TIME value (returned as timedelta) as HH:MM:SS"""
+    total_seconds = int(value.total_seconds())
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+# Exact-type dispatch for values returned by the MySQL driver, rendered as
+# ISO 8601. Only the endpoints that have always sent ISO dates (the visit,
+# workflow and inventory reads) encode with these, through iso_json_dumps.
+_JSONABLE_CONVERTERS = {
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    dt_time: dt_time.isoformat,
+    timedelta: _format_timedelta,
+}
+
+# TIME columns, which Flask cannot encode at all. DATE and DATETIME keep
+# Flask's default RFC 1123 format on every other endpoint.
+_TIME_CONVERTERS = {
+    dt_time: dt_time.isoformat,
+    timedelta: _format_timedelta,
+}
+
+class ClinicJSONProvider(DefaultJSONProvider):
+    """JSON provider that also encodes TIME values (time/timedelta).
+
+    Output is always compact and keys are emitted in insertion order;
+    sorting every dict key of every row was pure overhead for API clients.
+    """
+
+    sort_keys = False
+    compact = True
+    ensure_ascii = False
+
+    @staticmethod
+    def default(obj):
+        converter = _TIME_CONVERTERS.get(type(obj))
+        if converter is not None:
+            return converter(obj)
+        return DefaultJSONProvider.default(obj)
+
+def _iso_json_default(obj):
+    converter = _JSONABLE_CONVERTERS.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+    return DefaultJSONProvider.default(obj)
+
+def iso_json_dumps(obj) -> str:
+    """Encode like the app provider, but with DATE/DATETIME/TIME as ISO 8601.
+
+    Values are converted while the encoder runs, so rows can be passed as
+    returned by the driver without a separate conversion pass.
+    """
+    return json.dumps(obj, default=_iso_json_default, ensure_ascii=False, separators=(',', ':'))
+
+def iso_jsonify(payload) -> Response:
+    """jsonify() for the endpoints whose dates are ISO 8601 on the wire"""
+    return app.response_class(iso_json_dumps(payload) + '\n', mimetype=app.json.mimetype)
+
+app.json = ClinicJSONProvider(app)
 
 # Database configuration
 DB_CONFIG = {
@@ -61,58 +163,751 @@ DB_CONFIG = {
     'user': os.environ.get('DB_USER', 'root'),
     'password': os.environ.get('DB_PASSWORD', 'Transport@2025'),
     'port': int(os.environ.get('DB_PORT', 3306)),
-    'autocommit': False,
+    # Single statements commit on their own; multi-statement writes open an
+    # explicit transaction (DatabaseManager.pooled_cursor(commit=True))
+    'autocommit': True,
     'use_unicode': True,
     'charset': 'utf8mb4'
 }
 
+# Read-only traffic (public browsing and reports) can be pointed at a replica
+# with DB_RO_HOST/DB_RO_PORT; by default it uses the primary. Those sessions
+# autocommit under READ COMMITTED, so long aggregates never hold a snapshot
+# open between statements.
+DB_RO_CONFIG = dict(
+    DB_CONFIG,
+    host=os.environ.get('DB_RO_HOST', DB_CONFIG['host']),
+    port=int(os.environ.get('DB_RO_PORT', DB_CONFIG['port'])),
+    autocommit=True,
+    init_command='SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED'
+)
+
+# Connection pool settings. Sessions are not reset on checkout (that costs a
+# re-authentication round trip); any open transaction is rolled back instead
+# when the connection is handed back at the end of a request.
+# mysql-connector caps a single pool at CNX_POOL_MAXSIZE connections; size the
+# pools together against the server's max_connections.
+DB_POOL_SIZE = min(int(os.environ.get('DB_POOL_SIZE', 20)), pooling.CNX_POOL_MAXSIZE)
+DB_RO_POOL_SIZE = min(int(os.environ.get('DB_RO_POOL_SIZE', 10)), pooling.CNX_POOL_MAXSIZE)
+DB_POOL_WAIT_WARN_MS = float(os.environ.get('DB_POOL_WAIT_WARN_MS', 100))
+# When every slot is checked out, callers queue for up to DB_POOL_TIMEOUT
+# seconds rather than opening connections past the pool size; a request
+# still waiting after that is answered 503 (see signal_pool_exhaustion).
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+
+DB_POOL_CONFIG = {
+    'pool_name': 'palmed_pool',
+    'pool_size': DB_POOL_SIZE,
+    'pool_reset_session': False
+}
+
+# Independent read queries within one request (e.g. dashboard counters) can
+# run concurrently. The executor is shared by every request in the process
+# and each worker checks out its own pooled connection on top of the
+# request's, so the worker count is capped at a quarter of the pool.
+# DB_PARALLEL_TIMEOUT is one deadline for all of a request's queries; any
+# not finished by then run inline on the request's connection instead.
+DB_PARALLEL_WORKERS = max(1, min(int(os.environ.get('DB_PARALLEL_WORKERS', DB_POOL_SIZE // 4)),
+                                 DB_POOL_SIZE // 4))
+DB_PARALLEL_TIMEOUT = float(os.environ.get('DB_PARALLEL_TIMEOUT', 5))
+_query_executor = ThreadPoolExecutor(max_workers=DB_PARALLEL_WORKERS, thread_name_prefix='db-query')
+
+# Separate pool for read-only public endpoints and reports so bursts of
+# anonymous browsing or heavy aggregates cannot starve the write path.
+DB_RO_POOL_CONFIG = {
+    'pool_name': 'palmed_pool_ro',
+    'pool_size': DB_RO_POOL_SIZE,
+    'pool_reset_session': False
+}
+
 class DatabaseManager:
     """Database connection and query management"""
-    
+
+    _pools = {}
+    _pool_lock = threading.Lock()
+
+    @staticmethod
+    def _get_pool(readonly: bool = False):
+        """Create the connection pool on first use (the database may be down at import time)"""
+        pool_config = DB_RO_POOL_CONFIG if readonly else DB_POOL_CONFIG
+        pool = DatabaseManager._pools.get(pool_config['pool_name'])
+        if pool is None:
+            with DatabaseManager._pool_lock:
+                pool = DatabaseManager._pools.get(pool_config['pool_name'])
+                if pool is None:
+                    try:
+                        db_config = DB_RO_CONFIG if readonly else DB_CONFIG
+                        pool = pooling.MySQLConnectionPool(**pool_config, **db_config)
+                        DatabaseManager._pools[pool_config['pool_name']] = pool
+                    except Error as e:
+                        logger.error(f"Connection pool creation error: {e}")
+        return pool
+
+    @staticmethod
+    def get_connection(readonly: bool = False):
+        """Check out a connection from the pool; the caller must close() it to return it.
+
+        The pool pings each connection (is_connected) before handing it out and
+        reconnects stale ones. mysql-connector's pool never blocks, so when every
+        slot is in use the checkout is retried with backoff for up to
+        DB_POOL_TIMEOUT seconds. Returns None if no slot frees up in time, or
+        the pool cannot be created.
+        """
+        pool = DatabaseManager._get_pool(readonly)
+        if pool is None:
+            return None
+
+        started = time.monotonic()
+        deadline = started + DB_POOL_TIMEOUT
+        delay = 0.005
+        while True:
+            try:
+                connection = pool.get_connection()
+                break
+            except PoolError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error(f"No free connection in {pool.pool_name} after {DB_POOL_TIMEOUT:.1f} s")
+                    if has_app_context():
+                        g.db_pool_exhausted = True
+                    return None
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.1)
+            except Error as e:
+                logger.error(f"Database connection error: {e}")
+                return None
+
+        waited_ms = (time.monotonic() - started) * 1000
+        if waited_ms > DB_POOL_WAIT_WARN_MS:
+            logger.warning(f"Slow checkout from {pool.pool_name}: {waited_ms:.1f} ms")
+        return connection
+
+    @staticmethod
+    def request_connection(readonly: bool = False):
+        """Return the connection shared by the current request, checking it out on first use.
+
+        Returns None when no connection is available. Callers must not close
+        it; release_db_connection hands it back to the pool at teardown.
+        """
+        attr = 'db_conn_ro' if readonly else 'db_conn'
+        connection = g.get(attr)
+        if connection is None:
+            connection = DatabaseManager.get_connection(readonly)
+            if connection is not None:
+                setattr(g, attr, connection)
+        return connection
+
+    @staticmethod
+    @contextmanager
+    def pooled_connection(readonly: bool = False):
+        """Yield the request's pooled connection, or a private one outside a request.
+
+        Inside an app context the connection is acquired lazily, stored on
+        ``g.db_conn`` (``g.db_conn_ro`` for the read-only pool) and shared by
+        every query of the request; it is returned to the pool by
+        ``release_db_connection`` at teardown. Requests marked with
+        ``@read_only`` always use the read-only pool.
+        """
+        if has_app_context():
+            readonly = readonly or g.get('db_readonly', False)
+            connection = DatabaseManager.request_connection(readonly)
+            if connection is None:
+                raise Error(msg="No database connection available")
+            yield connection
+            return
+
+        connection = DatabaseManager.get_connection(readonly)
+        if connection is None:
+            raise Error(msg="No database connection available")
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    @contextmanager
+    def pooled_cursor(dictionary: bool = True, commit: bool = False, readonly: bool = False):
+        """Yield a cursor on the pooled connection, roll back on error.
+
+        Connections autocommit, so with commit=True the block runs inside an
+        explicit transaction that is committed on success; use it whenever
+        several statements must apply together.
+
+        A block opened while a transaction is already open on the shared
+        request connection joins it: only the outermost block, which started
+        the transaction, commits or rolls back, so a nested commit=True block
+        (or a failing execute_query inside one) cannot end it midway.
+        """
+        with DatabaseManager.pooled_connection(readonly) as connection:
+            outermost = not connection.in_transaction
+            cursor = connection.cursor(dictionary=dictionary)
+            try:
+                if commit and outermost:
+                    connection.start_transaction()
+                yield cursor
+                if commit and outermost:
+                    connection.commit()
+            except Exception:
+                if outermost:
+                    try:
+                        connection.rollback()
+                    except Error:
+                        pass
+                raise
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def execute_query(query: str, params: tuple = None, fetch: bool = False, readonly: bool = False,
+                      return_lastrowid: bool = False):
+        """Run one statement: rows when fetch, else the rowcount, or the new AUTO_INCREMENT
+        id when return_lastrowid (read from the same connection, so never another request's).
+        Returns None on error."""
+        try:
+            # One statement: autocommit applies it, no COMMIT round trip needed
+            with DatabaseManager.pooled_cursor(readonly=readonly) as cursor:
+                cursor.execute(query, params or ())
+
+                if fetch:
+                    result = cursor.fetchall()
+                elif return_lastrowid:
+                    result = cursor.lastrowid
+                else:
+                    result = cursor.rowcount
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query %s with parameters %s -> %s", query, params,
+                             f"{len(result)} rows" if fetch else f"{result} affected")
+
+            return result
+        except Error as e:
+            logger.error(f"Query execution error: {e}")
+            return None
+
     @staticmethod
-    def get_connection():
+    def _prepared_cursor(connection, query: str, params: tuple, dictionary: bool):
+        """Execute query on this connection's cached prepared cursor and return the cursor"""
+        raw = connection._cnx if isinstance(connection, pooling.PooledMySQLConnection) else connection
+        statements = getattr(raw, '_prepared_statements', None)
+        if statements is None:
+            statements = raw._prepared_statements = {}
+
+        key = (query, dictionary)
+        cursor = statements.get(key)
+        if cursor is None:
+            cursor = statements[key] = connection.cursor(prepared=True, dictionary=dictionary)
+        try:
+            cursor.execute(query, params or ())
+        except Error:
+            # Statement handles do not survive a reconnect; prepare it again once
+            cursor = statements[key] = connection.cursor(prepared=True, dictionary=dictionary)
+            cursor.execute(query, params or ())
+        return cursor
+
+    @staticmethod
+    def execute_prepared(query: str, params: tuple = None):
+        """Run a hot SELECT as a server-side prepared statement and return dict rows.
+
+        The prepared cursor is cached on the underlying connection, so each
+        pooled connection prepares a statement once and afterwards only sends
+        parameters. Pass a module-level constant: the driver skips re-preparing
+        only when handed the identical query object.
+        """
         try:
-            connection = mysql.connector.connect(**DB_CONFIG)
-            if connection.is_connected():
-                logger.info("Database connection successful")
-                return connection
+            with DatabaseManager.pooled_connection() as connection:
+                return DatabaseManager._prepared_cursor(connection, query, params, True).fetchall()
         except Error as e:
-            logger.error(f"Database connection error: {e}")
+            logger.error(f"Prepared query execution error: {e}")
             return None
-    
+
     @staticmethod
-    def execute_query(query: str, params: tuple = None, fetch: bool = False):
-        connection = DatabaseManager.get_connection()
-        if not connection:
-            logger.error("No database connection available")
+    def execute_one(query: str, params: tuple, columns: Tuple[str, ...]) -> Optional[Dict]:
+        """Prepared single-row lookup returned as dict(zip(columns, row)), or None.
+
+        Uses a plain tuple cursor: columns must list the SELECT's columns in
+        order, which spares the dictionary cursor's per-row name mapping on
+        the per-login and per-session lookups.
+        """
+        try:
+            with DatabaseManager.pooled_connection() as connection:
+                rows = DatabaseManager._prepared_cursor(connection, query, params, False).fetchall()
+        except Error as e:
+            logger.error(f"Prepared query execution error: {e}")
             return None
-        
+        return dict(zip(columns, rows[0])) if rows else None
+
+    @staticmethod
+    def iter_query(query: str, params: tuple = None, readonly: bool = False, fetch_size: int = 500):
+        """Iterate rows from an unbuffered (server-side) cursor, fetch_size rows per read.
+
+        Large result sets are never materialised in full. An unbuffered cursor
+        monopolises its connection until drained, so a dedicated connection is
+        checked out and held until the iterator is exhausted or closed.
+
+        The query runs and its first batch is read before this returns, so a
+        failure there raises Error to the caller while it can still answer
+        500. A failure later is re-raised from the iterator: a streamed
+        response then aborts instead of closing its JSON around a truncated list.
+        """
+        rows = DatabaseManager._stream_rows(query, params, readonly, fetch_size)
+        next(rows)
+        return rows
+
+    @staticmethod
+    def _stream_rows(query: str, params: Optional[tuple], readonly: bool, fetch_size: int):
+        """Generator behind iter_query; yields None once the first batch is read"""
+        connection = DatabaseManager.get_connection(readonly)
+        if connection is None:
+            raise Error(msg="No database connection available")
+
+        cursor = None
         try:
-            cursor = connection.cursor(dictionary=True)
-            logger.info(f"Executing query: {query}")
-            if params:
-                logger.info(f"With parameters: {params}")
-                
+            cursor = connection.cursor(dictionary=True, buffered=False)
             cursor.execute(query, params or ())
-            
-            if fetch:
-                result = cursor.fetchall()
-                logger.info(f"Query returned {len(result) if result else 0} rows")
-            else:
-                connection.commit()
-                result = cursor.rowcount
-                logger.info(f"Query affected {result} rows")
-            
-            return result
+            rows = cursor.fetchmany(fetch_size)
+            yield None
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(fetch_size)
         except Error as e:
-            logger.error(f"Query execution error: {e}")
-            if connection:
-                connection.rollback()
-            return None
+            logger.error(f"Streaming query error: {e}")
+            raise
         finally:
-            if connection and connection.is_connected():
+            try:
+                if connection.unread_result:
+                    connection.consume_results()
+                if cursor is not None:
+                    cursor.close()
+                if connection.in_transaction:
+                    connection.rollback()
+            except Error:
+                pass
+            connection.close()
+
+    @staticmethod
+    def execute_many(query: str, seq_params: List[tuple]):
+        """Execute one statement for many parameter tuples in a single commit"""
+        try:
+            with DatabaseManager.pooled_cursor(dictionary=False, commit=True) as cursor:
+                cursor.executemany(query, seq_params)
+                return cursor.rowcount
+        except Error as e:
+            logger.error(f"Batch execution error: {e}")
+            return None
+
+    @staticmethod
+    def execute_multi(query: str, params: tuple = None, readonly: bool = False) -> Optional[List[list]]:
+        """Send several ;-separated SELECTs in one round trip; returns the rows of each result set"""
+        try:
+            with DatabaseManager.pooled_cursor(readonly=readonly) as cursor:
+                return [
+                    result.fetchall()
+                    for result in cursor.execute(query, params, multi=True)
+                    if result.with_rows
+                ]
+        except Error as e:
+            logger.error(f"Multi-statement query error: {e}")
+            return None
+
+    @staticmethod
+    def call_proc(proc_name: str, args: tuple = ()) -> Optional[List[list]]:
+        """CALL a stored procedure with IN arguments; returns the rows of each result set.
+
+        Unlike cursor.callproc, which first SETs every argument as a session
+        variable, this sends a single CALL statement: one round trip.
+        """
+        placeholders = ', '.join(['%s'] * len(args))
+        return DatabaseManager.execute_multi(f"CALL {proc_name}({placeholders})", args)
+
+    @staticmethod
+    def execute_parallel(queries: List[tuple], readonly: bool = False) -> list:
+        """Run independent (query, params) fetches concurrently; results keep the input order.
+
+        Workers have no app context, so each query gets its own pooled
+        connection rather than the request's. The whole set shares one
+        DB_PARALLEL_TIMEOUT deadline: a query still queued behind other
+        requests' work (or still running) when it passes is cancelled and
+        run inline on the request's connection, so a busy executor slows
+        the page rather than failing it. A failed query yields None, as
+        with execute_query.
+        """
+        deadline = time.monotonic() + DB_PARALLEL_TIMEOUT
+        futures = [
+            _query_executor.submit(DatabaseManager.execute_query, query, params, True, readonly)
+            for query, params in queries
+        ]
+        results = []
+        for (query, params), future in zip(queries, futures):
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("Parallel query missed its deadline, running it inline")
+                results.append(DatabaseManager.execute_query(query, params, fetch=True, readonly=readonly))
+        return results
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    """Return the request's pooled connections, discarding any open transaction"""
+    for attr in ('db_conn', 'db_conn_ro'):
+        connection = g.pop(attr, None)
+        if connection is None:
+            continue
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            pass
+        try:
+            connection.close()
+        except Error as e:
+            logger.warning(f"Failed to release database connection: {e}")
+
+def read_only(f):
+    """Route every query of the decorated (GET) endpoint to the read-only pool/replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.db_readonly = True
+        return f(*args, **kwargs)
+    return decorated
+
+STREAM_CHUNK_ROWS = 100
+
+def _stream_json_array(rows, dumps):
+    """Yield the encoded elements of a JSON array, STREAM_CHUNK_ROWS rows per write"""
+    chunk = []
+    separator = ''
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+
+def stream_json_list(key: str, rows, dumps=None):
+    """Stream {"success": true, "<key>": [...]} without building the list in memory.
+
+    Rows are encoded with dumps (the app JSON provider by default) and written
+    in chunks of STREAM_CHUNK_ROWS so the server is not flushing one row per write.
+    """
+    yield '{"success": true, ' + json.dumps(key) + ': ['
+    yield from _stream_json_array(rows, dumps or app.json.dumps)
+    yield ']}'
+
+def stream_json_data(key: str, rows, trailer=None, dumps=None):
+    """Stream {"success": true, "data": {"<key>": [...], ...}} row by row.
+
+    trailer, if given, is called once the rows are exhausted and its dict is
+    written after the list, so summaries can be accumulated while streaming.
+    """
+    dumps = dumps or app.json.dumps
+    yield '{"success": true, "data": {' + json.dumps(key) + ': ['
+    yield from _stream_json_array(rows, dumps)
+    yield ']'
+    for name, value in (trailer() if trailer else {}).items():
+        yield ', ' + json.dumps(name) + ': ' + dumps(value)
+    yield '}}'
+
+def encode_page_cursor(*values) -> str:
+    """Opaque keyset cursor for the last row of a page (URL-safe base64 of a JSON array)"""
+    # ISO 8601 so the decoded values can be bound straight back into SQL
+    return base64.urlsafe_b64encode(iso_json_dumps(values).encode()).decode().rstrip('=')
+
+def decode_page_cursor(raw: str, size: int) -> Optional[list]:
+    """Decode a cursor from encode_page_cursor; None unless it holds exactly size values"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(raw + '=' * (-len(raw) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+# ============================================================================
+# AUDIT LOGGING
+# ============================================================================
+
+# Audit rows are queued by request handlers and written in batches by a
+# background worker, so an audit INSERT never sits on the request path.
+# AUDIT_WORKER=process moves the writer into a separate process so batch
+# building and driver work do not compete with request threads for the GIL.
+AUDIT_QUEUE_MAXSIZE = int(os.environ.get('AUDIT_QUEUE_MAXSIZE', 10000))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 0.5))
+AUDIT_WORKER = os.environ.get('AUDIT_WORKER', 'thread').lower()
+AUDIT_USER_AGENT_MAX = 255
+# Batches the database rejects (e.g. during an outage) are appended to this
+# JSON-lines file and fsynced instead of being lost; empty disables spooling.
+AUDIT_SPOOL_PATH = os.environ.get('AUDIT_SPOOL_PATH', '')
+# How long interpreter shutdown waits for the writer to flush queued rows
+AUDIT_SHUTDOWN_TIMEOUT = float(os.environ.get('AUDIT_SHUTDOWN_TIMEOUT', 5))
+
+AUDIT_INSERT_QUERY = """
+INSERT INTO audit_log (user_id, table_name, record_id, action, old_values, new_values,
+                       ip_address, user_agent, created_at)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+_audit_queue = None
+_audit_worker = None
+_audit_worker_lock = threading.Lock()
+# Entries dropped because the queue was full, since process start
+_audit_dropped = 0
+_audit_dropped_lock = threading.Lock()
+
+def _drain_audit_queue(audit_queue, write_batch):
+    """Collect up to AUDIT_BATCH_SIZE rows (or whatever arrives within
+    AUDIT_FLUSH_INTERVAL) and hand each batch to write_batch.
+    A None sentinel flushes the current batch and stops the worker."""
+    while True:
+        row = audit_queue.get()
+        if row is None:
+            return
+        batch = [row]
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = audit_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is None:
+                write_batch(batch)
+                return
+            batch.append(row)
+        write_batch(batch)
+
+def _spool_audit_batch(batch: List[tuple]):
+    """Append an unwritten batch to AUDIT_SPOOL_PATH, one JSON array per row"""
+    if not AUDIT_SPOOL_PATH:
+        return
+    try:
+        with open(AUDIT_SPOOL_PATH, 'a', encoding='utf-8') as spool:
+            for row in batch:
+                spool.write(json.dumps(row, default=str) + '\n')
+            spool.flush()
+            os.fsync(spool.fileno())
+    except OSError as e:
+        logger.error(f"Failed to spool {len(batch)} audit log entries: {e}")
+
+def _write_audit_batch(batch: List[tuple]):
+    if DatabaseManager.execute_many(AUDIT_INSERT_QUERY, batch) is None:
+        logger.warning(f"Failed to write {len(batch)} audit log entries")
+        _spool_audit_batch(batch)
+
+def _audit_writer(audit_queue):
+    """Thread worker: writes batches through the shared connection pool"""
+    _drain_audit_queue(audit_queue, _write_audit_batch)
+
+def _audit_process_writer(audit_queue, db_config: Dict):
+    """Process worker: keeps one dedicated connection and reconnects after failures"""
+    connection = None
+
+    def write_batch(batch):
+        nonlocal connection
+        try:
+            if connection is None or not connection.is_connected():
+                connection = mysql.connector.connect(**db_config)
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(AUDIT_INSERT_QUERY, batch)
+                connection.commit()
+            finally:
                 cursor.close()
-                connection.close()
+        except Error as e:
+            logger.warning(f"Failed to write {len(batch)} audit log entries: {e}")
+            _spool_audit_batch(batch)
+            connection = None
+
+    _drain_audit_queue(audit_queue, write_batch)
+
+def _start_audit_writer():
+    global _audit_queue, _audit_worker
+    with _audit_worker_lock:
+        if _audit_worker is not None and _audit_worker.is_alive():
+            return
+        first_start = _audit_worker is None
+        if not first_start:
+            logger.warning("Audit writer exited unexpectedly, restarting it")
+        if AUDIT_WORKER == 'process':
+            context = multiprocessing.get_context('spawn')
+            if _audit_queue is None:
+                _audit_queue = context.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+            _audit_worker = context.Process(
+                target=_audit_process_writer, args=(_audit_queue, DB_CONFIG),
+                name='audit-writer', daemon=True
+            )
+        else:
+            if _audit_queue is None:
+                _audit_queue = queue.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+            _audit_worker = threading.Thread(
+                target=_audit_writer, args=(_audit_queue,), name='audit-writer', daemon=True
+            )
+        _audit_worker.start()
+        if first_start:
+            atexit.register(_stop_audit_writer)
+
+def _stop_audit_writer():
+    """Flush queued audit rows at interpreter shutdown instead of losing them"""
+    worker = _audit_worker
+    if worker is None or not worker.is_alive():
+        return
+    try:
+        _audit_queue.put(None, timeout=AUDIT_SHUTDOWN_TIMEOUT)
+    except queue.Full:
+        logger.warning("Audit queue full at shutdown, queued entries may be lost")
+        return
+    worker.join(AUDIT_SHUTDOWN_TIMEOUT)
+    if worker.is_alive():
+        logger.warning("Audit writer did not finish flushing before shutdown")
+    if _audit_dropped:
+        logger.warning(f"{_audit_dropped} audit log entries were dropped because the queue was full")
+
+def audit_log(user_id, table_name: str, action: str, record_id=None,
+              old_values: Optional[Dict] = None, new_values: Optional[Dict] = None):
+    """Queue an audit_log row for the background writer (never blocks the caller)"""
+    global _audit_dropped
+    if _audit_worker is None or not _audit_worker.is_alive():
+        _start_audit_writer()
+
+    ip_address = user_agent = None
+    if has_request_context():
+        # Resolved once per request however many audit rows it writes
+        client = g.get('audit_client')
+        if client is None:
+            client = g.audit_client = (
+                request.remote_addr,
+                request.headers.get('User-Agent', '')[:AUDIT_USER_AGENT_MAX]
+            )
+        ip_address, user_agent = client
+
+    row = (
+        user_id,
+        table_name,
+        record_id,
+        action,
+        json.dumps(old_values) if old_values is not None else None,
+        json.dumps(new_values) if new_values is not None else None,
+        ip_address,
+        user_agent,
+        datetime.now(timezone.utc)
+    )
+    try:
+        _audit_queue.put_nowait(row)
+    except queue.Full:
+        with _audit_dropped_lock:
+            _audit_dropped += 1
+            dropped = _audit_dropped
+        logger.warning(f"Audit queue full, dropping {action} entry for {table_name} ({dropped} dropped so far)")
+
+def normalize_role(raw_role) -> str:
+    """Normalize a role name for comparison ('Social Worker' -> 'social_worker').
+
+    The result is interned: role names form a small closed set, so every
+    session and every role_required set share one string object per role
+    and membership checks resolve on identity.
+    """
+    return sys.intern(str(raw_role).strip().lower().replace(' ', '_'))
+
+def parse_province_list(raw) -> Tuple[str, ...]:
+    """Decode users.geographic_restrictions (JSON array, or a bare province) into a tuple"""
+    if not raw:
+        return ()
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode()
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return ()
+    if isinstance(raw, str):
+        return (raw,)
+    if isinstance(raw, list):
+        return tuple(province for province in raw if province)
+    return ()
+
+# Decoded and validated sessions, keyed by a hash of the bearer token, so a
+# burst of dashboard calls with the same token costs one JWT verify and one
+# user lookup. A deactivated user keeps access for at most SESSION_CACHE_TTL.
+SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 30))
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 4096))
+
+_session_cache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL)
+_session_cache_lock = threading.Lock()
+_session_fill_locks: Dict[bytes, threading.Lock] = {}
+
+# Signing key and decode arguments prepared once instead of per request
+JWT_ALGORITHM = 'HS256'
+_JWT_KEY = app.config['SECRET_KEY'].encode('utf-8')
+_JWT_ALGORITHMS = [JWT_ALGORITHM]
+# PyJWT rejects tokens missing these claims with MissingRequiredClaimError
+# (an InvalidTokenError, so a 401) instead of a KeyError further down
+_JWT_DECODE_OPTIONS = {'verify_aud': False, 'require': ['exp', 'user_id']}
+
+# Get user details from database - using correct schema columns.
+# Runs as a prepared statement on every session-cache miss; only the columns
+# handlers read from request.current_user are selected.
+SESSION_USER_QUERY = """
+SELECT u.id, u.email, u.first_name, u.last_name, u.geographic_restrictions, ur.role_name
+FROM users u 
+JOIN user_roles ur ON u.role_id = ur.id 
+WHERE u.id = %s AND u.is_active = TRUE
+"""
+SESSION_USER_COLUMNS = ('id', 'email', 'first_name', 'last_name', 'geographic_restrictions', 'role_name')
+
+def _fetch_session(token: str) -> Optional[Tuple[Dict, float]]:
+    """Verify the token and load its active user; returns (user, token expiry) or None"""
+    data = jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS, leeway=0)
+    current_user_id = data['user_id']
+
+    current_user = DatabaseManager.execute_one(SESSION_USER_QUERY, (current_user_id,), SESSION_USER_COLUMNS)
+    if not current_user:
+        return None
+
+    # Normalized once here so role checks are a single set lookup and
+    # province filters never re-parse the JSON column per request
+    current_user['role_key'] = normalize_role(current_user.get('role_name', ''))
+    current_user['allowed_provinces'] = parse_province_list(current_user.get('geographic_restrictions'))
+    return current_user, data['exp']
+
+def load_session_user(token: str) -> Optional[Dict]:
+    """Return a copy of the token's user from the session cache, filling it on a miss.
+
+    Concurrent misses for the same token wait on a per-token lock so only one
+    of them hits the database. Raises jwt errors for invalid or expired tokens.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _session_cache_lock:
+        entry = _session_cache.get(key)
+        if entry is None:
+            fill_lock = _session_fill_locks.setdefault(key, threading.Lock())
+
+    if entry is None:
+        with fill_lock:
+            try:
+                with _session_cache_lock:
+                    entry = _session_cache.get(key)
+                if entry is None:
+                    entry = _fetch_session(token)
+                    if entry is None:
+                        return None
+                    with _session_cache_lock:
+                        _session_cache[key] = entry
+            finally:
+                with _session_cache_lock:
+                    _session_fill_locks.pop(key, None)
+
+    user, expires_at = entry
+    if expires_at <= time.time():
+        raise jwt.ExpiredSignatureError('Signature has expired')
+    return dict(user)
+
+# Tokens issued by login are a few hundred bytes; anything far larger is junk
+MAX_TOKEN_LENGTH = 4096
 
 def token_required(f):
     """JWT token authentication decorator"""
@@ -122,27 +917,21 @@ def token_required(f):
         
         if not token:
             return jsonify({'success': False, 'error': 'Token is missing'}), 401
+
+        # Oversized headers are rejected before any hashing or JWT parsing
+        if len(token) > MAX_TOKEN_LENGTH:
+            return jsonify({'success': False, 'error': 'Invalid token'}), 401
         
         try:
-            if token.startswith('Bearer '):
+            if token[:7] == 'Bearer ':
                 token = token[7:]
             
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user_id = data['user_id']
-            
-            # Get user details from database - using correct schema columns
-            user_query = """
-            SELECT u.*, ur.role_name 
-            FROM users u 
-            JOIN user_roles ur ON u.role_id = ur.id 
-            WHERE u.id = %s AND u.is_active = TRUE
-            """
-            user = DatabaseManager.execute_query(user_query, (current_user_id,), fetch=True)
+            current_user = load_session_user(token)
             
-            if not user:
+            if not current_user:
                 return jsonify({'success': False, 'error': 'Invalid token'}), 401
             
-            request.current_user = user[0]
+            request.current_user = current_user
             
         except jwt.ExpiredSignatureError:
             return jsonify({'success': False, 'error': 'Token has expired'}), 401
@@ -156,7 +945,7 @@ def token_required(f):
 def role_required(allowed_roles: List[str]):
     """Role-based access control decorator (case-insensitive, normalized)."""
     # Normalize the allowed roles once
-    allowed_normalized = {str(r).strip().lower().replace(' ', '_') for r in allowed_roles}
+    allowed_normalized = frozenset(normalize_role(r) for r in allowed_roles)
 
     def decorator(f):
         @wraps(f)
@@ -164,8 +953,11 @@ def role_required(allowed_roles: List[str]):
             if not hasattr(request, 'current_user'):
                 return jsonify({'success': False, 'error': 'Authentication required'}), 401
 
-            raw_role = request.current_user.get('role_name', '')
-            user_role = str(raw_role).strip().lower().replace(' ', '_')
+            current_user = request.current_user
+            user_role = current_user.get('role_key')
+            if user_role is None:
+                raw_role = current_user.get('role_name', '')
+                user_role = raw_role if raw_role in allowed_normalized else normalize_role(raw_role)
 
             if user_role not in allowed_normalized:
                 return jsonify({'success': False, 'error': 'Insufficient permissions'}), 403
@@ -178,6 +970,147 @@ def role_required(allowed_roles: List[str]):
 # AUTHENTICATION ENDPOINTS
 # ============================================================================
 
+# Successful password checks, so a client that logs in repeatedly (mobile apps
+# reconnecting) pays the deliberately slow KDF once per window. Keys are an
+# HMAC under a per-process random key of the stored hash and the password, so
+# nothing password-derived that is usable offline is kept in memory, and a
+# password change (new stored hash) never matches an old entry.
+PASSWORD_CACHE_TTL = int(os.environ.get('PASSWORD_CACHE_TTL', 300))
+PASSWORD_CACHE_SIZE = int(os.environ.get('PASSWORD_CACHE_SIZE', 5000))
+
+_password_cache = TTLCache(maxsize=PASSWORD_CACHE_SIZE, ttl=PASSWORD_CACHE_TTL)
+_password_cache_lock = threading.Lock()
+_password_cache_key = os.urandom(32)
+
+# Writes the login response does not depend on run here instead of holding
+# up the response; pending writes are flushed on interpreter shutdown.
+_login_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='login-writes')
+atexit.register(_login_executor.shutdown, wait=True)
+
+def _record_last_login(user_id: int):
+    # Runs outside the request, so this checks out its own pooled connection
+    if DatabaseManager.execute_query("UPDATE users SET last_login = UTC_TIMESTAMP() WHERE id = %s", (user_id,)) is None:
+        logger.warning(f"Failed to update last login for user {user_id}")
+
+# Statements run on every login or registration, executed as prepared
+# statements (see DatabaseManager.execute_prepared and execute_one)
+LOGIN_USER_QUERY = """
+SELECT u.id, u.email, u.password_hash, u.first_name, u.last_name, u.mp_number,
+       u.geographic_restrictions, u.requires_approval, u.approved_at, ur.role_name
+FROM users u 
+JOIN user_roles ur ON u.role_id = ur.id 
+WHERE u.email = %s AND u.is_active = TRUE
+"""
+LOGIN_USER_COLUMNS = ('id', 'email', 'password_hash', 'first_name', 'last_name', 'mp_number',
+                      'geographic_restrictions', 'requires_approval', 'approved_at', 'role_name')
+USER_ID_BY_EMAIL_QUERY = "SELECT id FROM users WHERE email = %s"
+ROLE_IDS_QUERY = "SELECT id, role_name FROM user_roles"
+
+# user_roles is a handful of rows that only change through migrations, so
+# registration resolves role names from an in-process map reloaded every
+# ROLE_CACHE_TTL seconds instead of querying it per signup.
+ROLE_CACHE_TTL = int(os.environ.get('ROLE_CACHE_TTL', 300))
+
+_role_id_cache = TTLCache(maxsize=1, ttl=ROLE_CACHE_TTL)
+_role_id_cache_lock = threading.Lock()
+
+def get_role_id(role_name: str) -> Optional[int]:
+    """Look up a role id by name (case-insensitive, like the column's collation)"""
+    with _role_id_cache_lock:
+        role_ids = _role_id_cache.get('roles')
+    if role_ids is None:
+        rows = DatabaseManager.execute_query(ROLE_IDS_QUERY, fetch=True)
+        if rows is None:
+            return None
+        role_ids = {row['role_name'].lower(): row['id'] for row in rows}
+        with _role_id_cache_lock:
+            _role_id_cache['roles'] = role_ids
+    return role_ids.get(role_name.lower())
+
+# New passwords are hashed with argon2id. The C implementation releases the
+# GIL while hashing, and the cost can be tuned per deployment to keep a
+# verification well under 30 ms. Existing werkzeug pbkdf2 hashes still verify
+# and are replaced with argon2id after the next successful login.
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))  # KiB
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+ARGON2_PREFIX = '$argon2'
+
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM
+)
+
+def hash_password(password: str) -> str:
+    """Hash a new password with the configured argon2id parameters"""
+    return _password_hasher.hash(password)
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """True for legacy werkzeug hashes and argon2 hashes with outdated parameters"""
+    if not password_hash.startswith(ARGON2_PREFIX):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(password_hash)
+    except InvalidHashError:
+        return True
+
+def _check_password(password_hash: str, password: str) -> bool:
+    if password_hash.startswith(ARGON2_PREFIX):
+        try:
+            return _password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def _rehash_password(user_id: int, old_hash: str, password: str):
+    # Only replaces the hash that was verified, so a concurrent password
+    # change is never overwritten
+    result = DatabaseManager.execute_query(
+        "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+        (hash_password(password), user_id, old_hash)
+    )
+    if result is None:
+        logger.warning(f"Failed to upgrade password hash for user {user_id}")
+
+# Login attempts per (client address, email) per fixed window. Storms beyond
+# the limit are refused before any database lookup or password KDF runs.
+# Keying on the email as well keeps clinics that share one address (NAT,
+# or a proxy when TRUSTED_PROXY_HOPS is unset) from locking each other out.
+LOGIN_RATE_LIMIT = int(os.environ.get('LOGIN_RATE_LIMIT', 20))
+LOGIN_RATE_WINDOW = int(os.environ.get('LOGIN_RATE_WINDOW', 60))
+
+_login_attempts = TTLCache(maxsize=50000, ttl=LOGIN_RATE_WINDOW)
+_login_attempts_lock = threading.Lock()
+
+def login_rate_limited(client: str, email: str) -> bool:
+    """Count a login attempt for email from client; True once it exceeds LOGIN_RATE_LIMIT in this window"""
+    if LOGIN_RATE_LIMIT <= 0:
+        return False
+    key = (client, email, int(time.monotonic() // LOGIN_RATE_WINDOW))
+    with _login_attempts_lock:
+        attempts = _login_attempts.get(key, 0) + 1
+        _login_attempts[key] = attempts
+    return attempts > LOGIN_RATE_LIMIT
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check a password against an argon2id or legacy werkzeug hash, caching successes"""
+    key = hmac.new(
+        _password_cache_key,
+        password_hash.encode() + b'\0' + password.encode(),
+        hashlib.sha256
+    ).digest()
+    with _password_cache_lock:
+        if _password_cache.get(key):
+            return True
+
+    valid = _check_password(password_hash, password)
+    # Failures are not cached: they would only spare a guessing client the KDF
+    if valid:
+        with _password_cache_lock:
+            _password_cache[key] = True
+    return valid
+
 @app.route('/api/auth/login', methods=['POST'])
 def login():
     """User authentication endpoint - Fixed to match database schema"""
@@ -190,39 +1123,36 @@ def login():
         email = data.get('email', '').strip().lower()
         password = data.get('password', '')
 
-        logger.info(f"Login attempt for email: {email}")
+        logger.debug("Login attempt for email: %s", email)
 
         if not email or not password:
             return jsonify({'success': False, 'error': 'Email and password are required'}), 400
 
-        if '@' not in email or '.' not in email:
+        if not validate_email(email):
             return jsonify({'success': False, 'error': 'Please enter a valid email address'}), 400
 
+        if login_rate_limited(request.remote_addr or '', email):
+            response = jsonify({'success': False, 'error': 'Too many login attempts, please try again later'})
+            return response, 429, {'Retry-After': str(LOGIN_RATE_WINDOW)}
+
         # Get user from database - using correct schema with JOIN to get role name
-        query = """
-        SELECT u.*, ur.role_name 
-        FROM users u 
-        JOIN user_roles ur ON u.role_id = ur.id 
-        WHERE u.email = %s AND u.is_active = TRUE
-        """
-        user = DatabaseManager.execute_query(query, (email,), fetch=True)
+        user_data = DatabaseManager.execute_one(LOGIN_USER_QUERY, (email,), LOGIN_USER_COLUMNS)
 
-        if not user:
-            logger.info(f"No active user found for email: {email}")
+        if not user_data:
+            logger.info("No active user found for email: %s", email)
             return jsonify({'success': False, 'error': 'Invalid email or password'}), 401
 
-        user_data = user[0]
-        logger.info(f"User found: {user_data['email']} with role: {user_data['role_name']}")
+        logger.debug("User found: %s with role: %s", user_data['email'], user_data['role_name'])
 
         # Verify password (gracefully handle unsupported legacy hash formats)
         try:
-            valid_password = check_password_hash(user_data['password_hash'], password)
+            valid_password = verify_password(user_data['password_hash'], password)
         except Exception as pw_err:
             logger.warning(f"Password hash format error for user {email}: {pw_err}")
             valid_password = False
 
         if not valid_password:
-            logger.info(f"Password mismatch for user: {email}")
+            logger.info("Password mismatch for user: %s", email)
             return jsonify({'success': False, 'error': 'Invalid email or password'}), 401
 
         # Check if user requires approval
@@ -230,47 +1160,34 @@ def login():
             return jsonify({'success': False, 'error': 'Your account is pending approval'}), 401
 
         # Generate JWT token using correct user ID field
+        issued_at = datetime.now(timezone.utc)
         token_payload = {
             'user_id': user_data['id'],  # Using 'id' instead of 'user_id'
             'email': user_data['email'],
             'role': user_data['role_name'],  # Using role_name from JOIN
-            'exp': datetime.now(timezone.utc) + timedelta(hours=24),
-            'iat': datetime.now(timezone.utc)
+            'exp': issued_at + timedelta(hours=24),
+            'iat': issued_at
         }
 
-        token = jwt.encode(token_payload, app.config['SECRET_KEY'], algorithm='HS256')
+        token = jwt.encode(token_payload, _JWT_KEY, algorithm=JWT_ALGORITHM)
+
+        # Upgrade legacy or outdated password hashes in the background
+        if password_needs_rehash(user_data['password_hash']):
+            try:
+                _login_executor.submit(_rehash_password, user_data['id'], user_data['password_hash'], password)
+            except RuntimeError as rehash_error:
+                logger.warning(f"Failed to schedule password rehash: {rehash_error}")
 
-        # Update last login
+        # Update last login in the background
         try:
-            update_login_query = "UPDATE users SET last_login = %s WHERE id = %s"
-            DatabaseManager.execute_query(update_login_query, (datetime.now(timezone.utc), user_data['id']))
-        except Exception as update_error:
+            _login_executor.submit(_record_last_login, user_data['id'])
+        except RuntimeError as update_error:
             logger.warning(f"Failed to update last login: {update_error}")
 
         # Log login activity
-        try:
-            log_query = """
-            INSERT INTO audit_log (user_id, table_name, record_id, action, ip_address, user_agent, created_at)
-            VALUES (%s, 'users', %s, 'LOGIN', %s, %s, %s)
-            """
-            DatabaseManager.execute_query(log_query, (
-                user_data['id'],
-                user_data['id'],
-                request.remote_addr,
-                request.headers.get('User-Agent', ''),
-                datetime.now(timezone.utc)
-            ))
-        except Exception as log_error:
-            logger.warning(f"Failed to log login activity: {log_error}")
+        audit_log(user_data['id'], 'users', 'LOGIN', record_id=user_data['id'])
 
-        # Parse geographic restrictions
-        geographic_restrictions = None
-        if user_data.get('geographic_restrictions'):
-            try:
-                import json
-                geographic_restrictions = json.loads(user_data['geographic_restrictions'])
-            except:
-                geographic_restrictions = []
+        geographic_restrictions = parse_province_list(user_data.get('geographic_restrictions'))
 
         response_data = {
             'success': True,
@@ -289,7 +1206,7 @@ def login():
             'message': 'Login successful'
         }
 
-        logger.info(f"Login successful for user: {email}")
+        logger.info("Login successful for user: %s", email)
         return jsonify(response_data), 200
 
     except Exception as e:
@@ -313,27 +1230,20 @@ def register():
         email = data['email'].strip().lower()
         
         # Validate email format
-        if '@' not in email or '.' not in email:
+        if not validate_email(email):
             return jsonify({'success': False, 'error': 'Please enter a valid email address'}), 400
 
         # Check if user already exists
-        existing_user = DatabaseManager.execute_query(
-            "SELECT id FROM users WHERE email = %s",
-            (email,),
-            fetch=True
-        )
+        existing_user = DatabaseManager.execute_prepared(USER_ID_BY_EMAIL_QUERY, (email,))
 
         if existing_user:
             return jsonify({'success': False, 'error': 'User with this email already exists'}), 409
 
         # Get role ID
-        role_query = "SELECT id FROM user_roles WHERE role_name = %s"
-        role_result = DatabaseManager.execute_query(role_query, (data['role'],), fetch=True)
+        role_id = get_role_id(data['role'])
         
-        if not role_result:
+        if role_id is None:
             return jsonify({'success': False, 'error': f'Invalid role: {data["role"]}'}), 400
-        
-        role_id = role_result[0]['id']
 
         # Validate role-specific requirements
         if data['role'] == 'doctor' and not data.get('mp_number', '').strip():
@@ -346,15 +1256,19 @@ def register():
         # Generate unique username if not provided
         username = data.get('username', f"{data['first_name'].lower()}_{data['last_name'].lower()}").replace(' ', '_')
         
-        # Check if username exists and make it unique
-        counter = 1
+        # Check if username exists and make it unique: fetch the name and all
+        # of its numbered variants in one query, then pick the first free suffix
         original_username = username
-        while True:
-            existing_username = DatabaseManager.execute_query(
-                "SELECT id FROM users WHERE username = %s", (username,), fetch=True
-            )
-            if not existing_username:
-                break
+        like_prefix = original_username.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        taken_rows = DatabaseManager.execute_query(
+            "SELECT username FROM users WHERE username = %s OR username LIKE %s",
+            (original_username, like_prefix + '\\_%'),
+            fetch=True
+        ) or []
+        # Compared lowercased to match the column's case-insensitive collation
+        taken = {row['username'].lower() for row in taken_rows}
+        counter = 1
+        while username.lower() in taken:
             username = f"{original_username}_{counter}"
             counter += 1
 
@@ -365,20 +1279,19 @@ def register():
         # Prepare geographic restrictions
         geographic_restrictions = data.get('assigned_province')
         if geographic_restrictions:
-            import json
             geographic_restrictions = json.dumps([geographic_restrictions])
 
         insert_query = """
         INSERT INTO users (username, email, password_hash, role_id, first_name, last_name, 
                           phone_number, mp_number, geographic_restrictions, is_active, 
                           requires_approval, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP())
         """
 
         result = DatabaseManager.execute_query(insert_query, (
             username,
             email,
-            generate_password_hash(data['password']),
+            hash_password(data['password']),
             role_id,
             data['first_name'].strip(),
             data['last_name'].strip(),
@@ -386,8 +1299,7 @@ def register():
             data.get('mp_number', '').strip() or None,
             geographic_restrictions,
             is_active,
-            requires_approval,
-            datetime.now(timezone.utc)
+            requires_approval
         ))
 
         if result:
@@ -426,6 +1338,52 @@ def verify_token():
 # PATIENT MANAGEMENT ENDPOINTS
 # ============================================================================
 
+PATIENT_GENDERS = ('Male', 'Female', 'Other')
+# Lower-cased input -> canonical value, built once instead of per request
+_GENDER_BY_LOWER = {gender.lower(): gender for gender in PATIENT_GENDERS}
+
+PATIENT_FULLTEXT_MIN_LENGTH = 3
+
+_EMPTY_JSON_LIST = '[]'
+
+def to_json_list(value) -> str:
+    """Encode a JSON list column: lists as-is, a non-blank string as a one-item list, else []"""
+    if isinstance(value, list):
+        return json.dumps(value) if value else _EMPTY_JSON_LIST
+    if isinstance(value, str):
+        value = value.strip()
+        if value:
+            return json.dumps([value])
+    return _EMPTY_JSON_LIST
+
+# Filtered patient totals, keyed by the WHERE clause and its parameters. A
+# freshly registered patient shows up in the total within PATIENT_COUNT_TTL.
+PATIENT_COUNT_TTL = int(os.environ.get('PATIENT_COUNT_TTL', 60))
+PATIENT_COUNT_CACHE_SIZE = int(os.environ.get('PATIENT_COUNT_CACHE_SIZE', 1024))
+
+_patient_count_cache = TTLCache(maxsize=PATIENT_COUNT_CACHE_SIZE, ttl=PATIENT_COUNT_TTL)
+_patient_count_cache_lock = threading.Lock()
+
+def cached_patient_count(where: str, params: tuple) -> Optional[int]:
+    """The cached total for this filter, or None"""
+    with _patient_count_cache_lock:
+        return _patient_count_cache.get((where, params))
+
+def cache_patient_count(where: str, params: tuple, total: int):
+    with _patient_count_cache_lock:
+        _patient_count_cache[(where, params)] = total
+
+def count_patients(where: str, params: tuple) -> int:
+    """COUNT(*) of patients matching where (filters on alias p only), cached briefly"""
+    total = cached_patient_count(where, params)
+    if total is None:
+        result = DatabaseManager.execute_query("SELECT COUNT(*) AS total FROM patients p" + where, params, fetch=True)
+        if not result:
+            return 0
+        total = result[0]['total']
+        cache_patient_count(where, params, total)
+    return total
+
 @app.route('/api/patients', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse', 'clerk', 'social_work', 'social_worker'])
@@ -435,65 +1393,110 @@ def get_patients():
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * limit
         
-        # Build query
-        base_query = """
-        SELECT p.*, 
-               COUNT(pv.id) as total_visits,
-               MAX(pv.visit_date) as last_visit
-        FROM patients p
-        LEFT JOIN patient_visits pv ON p.id = pv.patient_id
-        WHERE 1=1
-        """
-        
-        params = []
-        
-        if search:
-            base_query += " AND (p.first_name LIKE %s OR p.last_name LIKE %s OR p.medical_aid_number LIKE %s)"
+        # Filters shared by the page query and the total count
+        where = " WHERE 1=1"
+        where_params = []
+        
+        # Terms long enough for the ngram FULLTEXT index (migration 15) are
+        # matched as a phrase, which finds the same substrings as LIKE '%x%'
+        # without scanning every patient; shorter terms fall back to LIKE
+        phrase = search.replace('"', '').strip()
+        if len(phrase) >= PATIENT_FULLTEXT_MIN_LENGTH:
+            where += " AND MATCH(p.first_name, p.last_name, p.medical_aid_number) AGAINST (%s IN BOOLEAN MODE)"
+            where_params.append(f'"{phrase}"')
+        elif search:
+            where += " AND (p.first_name LIKE %s OR p.last_name LIKE %s OR p.medical_aid_number LIKE %s)"
             search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
+            where_params.extend([search_param, search_param, search_param])
         
         # Role-based filtering using geographic restrictions
         user_role = request.current_user.get('role_name')
         if user_role == 'doctor':
-            geographic_restrictions = request.current_user.get('geographic_restrictions')
-            if geographic_restrictions:
-                try:
-                    import json
-                    provinces = json.loads(geographic_restrictions)
-                    if provinces and len(provinces) > 0:
-                        province_placeholders = ','.join(['%s'] * len(provinces))
-                        base_query += f" AND p.province IN ({province_placeholders})"
-                        params.extend(provinces)
-                except:
-                    pass
-        
-        base_query += " GROUP BY p.id ORDER BY p.created_at DESC LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
-        
-        patients = DatabaseManager.execute_query(base_query, tuple(params), fetch=True)
-        
-        # Get total count
-        count_query = "SELECT COUNT(DISTINCT p.id) as total FROM patients p WHERE 1=1"
-        count_params = []
-        if search:
-            count_query += " AND (p.first_name LIKE %s OR p.last_name LIKE %s OR p.medical_aid_number LIKE %s)"
-            search_param = f"%{search}%"
-            count_params.extend([search_param, search_param, search_param])
-        
-        total_result = DatabaseManager.execute_query(count_query, tuple(count_params), fetch=True)
-        total = total_result[0]['total'] if total_result else 0
+            provinces = request.current_user.get('allowed_provinces')
+            if provinces:
+                province_placeholders = ','.join(['%s'] * len(provinces))
+                where += f" AND p.province IN ({province_placeholders})"
+                where_params.extend(provinces)
+        
+        # Total for page-number requests: later pages reuse the total the
+        # client got with page 1, otherwise it comes from the short-lived
+        # count cache. On a miss the page query computes it with a window
+        # function, so the page and its total still take one round trip.
+        total = None
+        if not cursor:
+            total_hint = request.args.get('total_hint')
+            if page > 1 and total_hint and total_hint.isdigit():
+                total = int(total_hint)
+            else:
+                total = cached_patient_count(where, tuple(where_params))
+        count_inline = not cursor and total is None
+
+        # Build query: total_visits and last_visit_date are kept in
+        # patient_visit_stats by triggers on patient_visits (migration 14)
+        columns = "p.*, COALESCE(vs.total_visits, 0) as total_visits, vs.last_visit_date as last_visit"
+        if count_inline:
+            columns += ", COUNT(*) OVER() AS total_count"
+        base_query = f"""
+        SELECT {columns}
+        FROM patients p
+        LEFT JOIN patient_visit_stats vs ON vs.patient_id = p.id
+        """ + where
+        params = list(where_params)
+        
+        if cursor:
+            # Keyset page: seek past the previous page's last patient on
+            # (created_at, id) instead of skipping OFFSET rows, and skip the count
+            last = decode_page_cursor(cursor, 2)
+            if last is None:
+                return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+            last_created_at, last_id = last
+            base_query += " AND p.created_at <= %s AND (p.created_at < %s OR p.id < %s)"
+            params.extend([last_created_at, last_created_at, last_id])
+
+        base_query += " ORDER BY p.created_at DESC, p.id DESC LIMIT %s"
+        params.append(limit)
+        if not cursor:
+            base_query += " OFFSET %s"
+            params.append(offset)
+        
+        patients = DatabaseManager.execute_query(base_query, tuple(params), fetch=True) or []
+        if count_inline:
+            if patients:
+                total = patients[0]['total_count']
+                for patient in patients:
+                    del patient['total_count']
+                cache_patient_count(where, tuple(where_params), total)
+            else:
+                # Past the last page there is no row to carry the total
+                total = count_patients(where, tuple(where_params))
+        next_cursor = None
+        if len(patients) == limit:
+            next_cursor = encode_page_cursor(patients[-1]['created_at'], patients[-1]['id'])
+
+        if cursor:
+            return jsonify({
+                'success': True,
+                'patients': patients,
+                'pagination': {
+                    'limit': limit,
+                    'next_cursor': next_cursor
+                }
+            }), 200
         
         return jsonify({
             'success': True,
-            'patients': patients or [],
+            'patients': patients,
             'pagination': {
                 'page': page,
                 'limit': limit,
                 'total': total,
-                'pages': (total + limit - 1) // limit
+                'pages': (total + limit - 1) // limit,
+                # Clients can continue from here with ?cursor= instead of ?page=
+                'next_cursor': next_cursor
             }
         }), 200
         
@@ -501,6 +1504,14 @@ def get_patients():
         logger.error(f"Get patients error: {e}")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
+# Unique keys on patients (named in 01 and migration 15) and the conflict each
+# one reports. MySQL names the key in ER_DUP_ENTRY as 'patients.<key>' from
+# 8.0.19 and as plain '<key>' before that.
+PATIENT_UNIQUE_KEY_ERRORS = {
+    'uq_patients_id_number': 'Patient with this ID number already exists',
+    'uq_patients_medical_aid': 'Patient with this medical aid number already exists',
+}
+PATIENT_DUPLICATE_KEY_RE = re.compile(r"for key '(?:patients\.)?(\w+)'")
 
 @app.route('/api/patients', methods=['POST'])
 @token_required
@@ -510,9 +1521,8 @@ def create_patient():
     try:
         data = request.get_json() or {}
         
-        logger.info(f"[PATIENT_CREATE] Received data from user {request.current_user.get('email', 'unknown')}: {data}")
-        logger.info(f"[PATIENT_CREATE] Request content type: {request.content_type}")
-        logger.info(f"[PATIENT_CREATE] Request headers: {dict(request.headers)}")
+        logger.debug("[PATIENT_CREATE] Received data from user %s: %s",
+                     request.current_user.get('email', 'unknown'), data)
 
         # Support payloads with full_name and telephone_number, etc.
         if 'first_name' not in data and data.get('full_name'):
@@ -521,16 +1531,17 @@ def create_patient():
             if parts:
                 data['first_name'] = parts[0]
                 data['last_name'] = ' '.join(parts[1:]) if len(parts) > 1 else 'N/A'
-                logger.info(f"[PATIENT_CREATE] Split full_name '{full_name}' into first_name='{data['first_name']}' and last_name='{data['last_name']}'")
+                logger.debug("[PATIENT_CREATE] Split full_name '%s' into first_name='%s' and last_name='%s'",
+                             full_name, data['first_name'], data['last_name'])
             
         # Handle various phone number field names
         if 'phone_number' not in data:
             if data.get('telephone'):
                 data['phone_number'] = data.get('telephone')
-                logger.info(f"[PATIENT_CREATE] Mapped telephone to phone_number: {data['phone_number']}")
+                logger.debug("[PATIENT_CREATE] Mapped telephone to phone_number: %s", data['phone_number'])
             elif data.get('telephone_number'):
                 data['phone_number'] = data.get('telephone_number')
-                logger.info(f"[PATIENT_CREATE] Mapped telephone_number to phone_number: {data['phone_number']}")
+                logger.debug("[PATIENT_CREATE] Mapped telephone_number to phone_number: %s", data['phone_number'])
             
         if 'physical_address' not in data and data.get('address'):
             data['physical_address'] = data.get('address')
@@ -546,7 +1557,7 @@ def create_patient():
             for alt_key in ['dateOfBirth', 'dob', 'birth_date', 'birthDate', 'dateofbirth']:
                 if data.get(alt_key):
                     data['date_of_birth'] = data.get(alt_key)
-                    logger.info(f"[PATIENT_CREATE] Mapped {alt_key} to date_of_birth: {data['date_of_birth']}")
+                    logger.debug("[PATIENT_CREATE] Mapped %s to date_of_birth: %s", alt_key, data['date_of_birth'])
                     break
 
         # Map alternate keys for gender
@@ -554,18 +1565,16 @@ def create_patient():
             alt_gender = data.get('Gender') or data.get('sex') or data.get('Sex') or data.get('gender_identity')
             if alt_gender is not None and str(alt_gender).strip():
                 data['gender'] = alt_gender
-                logger.info(f"[PATIENT_CREATE] Mapped alternate gender key to gender: {data['gender']}")
+                logger.debug("[PATIENT_CREATE] Mapped alternate gender key to gender: %s", data['gender'])
 
         # If member flag not provided, infer from presence of medical_aid_number
         if 'is_palmed_member' not in data and data.get('medical_aid_number'):
             data['is_palmed_member'] = True
 
-        logger.info(f"[PATIENT_CREATE] After normalization:")
-        logger.info(f"[PATIENT_CREATE] first_name: '{data.get('first_name')}' (type: {type(data.get('first_name'))})")
-        logger.info(f"[PATIENT_CREATE] last_name: '{data.get('last_name')}' (type: {type(data.get('last_name'))})")
-        logger.info(f"[PATIENT_CREATE] date_of_birth: '{data.get('date_of_birth')}' (type: {type(data.get('date_of_birth'))})")
-        logger.info(f"[PATIENT_CREATE] gender: '{data.get('gender')}' (type: {type(data.get('gender'))})")
-        logger.info(f"[PATIENT_CREATE] phone_number: '{data.get('phone_number')}' (type: {type(data.get('phone_number'))})")
+        if logger.isEnabledFor(logging.DEBUG):
+            for field in ('first_name', 'last_name', 'date_of_birth', 'gender', 'phone_number'):
+                logger.debug("[PATIENT_CREATE] After normalization %s: '%s' (type: %s)",
+                             field, data.get(field), type(data.get(field)))
 
         # Require minimal fields; allow missing date_of_birth and default gender later
         required_fields = ['first_name', 'last_name', 'phone_number']
@@ -573,16 +1582,13 @@ def create_patient():
         
         for field in required_fields:
             value = data.get(field)
-            logger.info(f"[PATIENT_CREATE] Validating field '{field}': value='{value}', type={type(value)}")
-            
+
             if value is None:
                 missing_fields.append(field)
                 logger.error(f"[PATIENT_CREATE] Field '{field}' is None")
             elif isinstance(value, str) and not value.strip():
                 missing_fields.append(field)
                 logger.error(f"[PATIENT_CREATE] Field '{field}' is empty or whitespace-only: '{value}'")
-            else:
-                logger.info(f"[PATIENT_CREATE] Field '{field}' is valid: '{value}'")
         
         if missing_fields:
             error_msg = f'Missing required fields: {", ".join(missing_fields)}'
@@ -610,66 +1616,22 @@ def create_patient():
                 }), 400
         
         # Gender: default to 'Other' if not provided, else normalize/validate
-        valid_genders = ['Male', 'Female', 'Other']
         if not data.get('gender'):
             data['gender'] = 'Other'
         else:
             gender_input = str(data['gender']).strip()
-            gender_match = None
-            for valid_gender in valid_genders:
-                if gender_input.lower() == valid_gender.lower():
-                    gender_match = valid_gender
-                    break
+            gender_match = _GENDER_BY_LOWER.get(gender_input.lower())
             if not gender_match:
                 logger.error(f"[PATIENT_CREATE] Invalid gender: {gender_input}")
                 return jsonify({
                     'success': False, 
-                    'error': f'gender must be one of: {valid_genders}'
+                    'error': f'gender must be one of: {list(PATIENT_GENDERS)}'
                 }), 400
             data['gender'] = gender_match
 
-        if data.get('id_number'):
-            existing_id = DatabaseManager.execute_query(
-                "SELECT id FROM patients WHERE id_number = %s",
-                (data['id_number'],),
-                fetch=True
-            )
-            if existing_id:
-                return jsonify({'success': False, 'error': 'Patient with this ID number already exists'}), 409
-        
-        if data.get('medical_aid_number'):
-            existing_medical_aid = DatabaseManager.execute_query(
-                "SELECT id FROM patients WHERE medical_aid_number = %s",
-                (data['medical_aid_number'],),
-                fetch=True
-            )
-            if existing_medical_aid:
-                return jsonify({'success': False, 'error': 'Patient with this medical aid number already exists'}), 409
-        
-        chronic_conditions = data.get('chronic_conditions', [])
-        allergies = data.get('allergies', [])
-        current_medications = data.get('current_medications', [])
-        
-        if isinstance(chronic_conditions, list):
-            chronic_conditions = json.dumps(chronic_conditions)
-        elif isinstance(chronic_conditions, str) and chronic_conditions.strip():
-            chronic_conditions = json.dumps([chronic_conditions.strip()])
-        else:
-            chronic_conditions = json.dumps([])
-            
-        if isinstance(allergies, list):
-            allergies = json.dumps(allergies)
-        elif isinstance(allergies, str) and allergies.strip():
-            allergies = json.dumps([allergies.strip()])
-        else:
-            allergies = json.dumps([])
-            
-        if isinstance(current_medications, list):
-            current_medications = json.dumps(current_medications)
-        elif isinstance(current_medications, str) and current_medications.strip():
-            current_medications = json.dumps([current_medications.strip()])
-        else:
-            current_medications = json.dumps([])
+        chronic_conditions = to_json_list(data.get('chronic_conditions'))
+        allergies = to_json_list(data.get('allergies'))
+        current_medications = to_json_list(data.get('current_medications'))
 
         insert_query = """
         INSERT INTO patients (medical_aid_number, first_name, last_name, date_of_birth,
@@ -677,7 +1639,7 @@ def create_patient():
                              emergency_contact_name, emergency_contact_phone, is_palmed_member,
                              member_type, chronic_conditions, allergies, current_medications,
                              created_by, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP())
         """
         
         insert_values = (
@@ -697,39 +1659,44 @@ def create_patient():
             chronic_conditions,
             allergies,
             current_medications,
-            request.current_user['id'],
-            datetime.utcnow()
+            request.current_user['id']
         )
         
-        logger.info(f"Executing insert with values: {insert_values}")
-        
-        result = DatabaseManager.execute_query(insert_query, insert_values)
+        logger.debug("Executing insert with values: %s", insert_values)
         
-        if result and result > 0:
-            try:
-                log_query = """
-                INSERT INTO audit_log (user_id, table_name, action, new_values, created_at)
-                VALUES (%s, 'patients', 'INSERT', %s, %s)
-                """
-                new_values = json.dumps({
-                    'first_name': data['first_name'],
-                    'last_name': data['last_name'],
-                    'medical_aid_number': data.get('medical_aid_number')
-                })
-                DatabaseManager.execute_query(log_query, (
-                    request.current_user['id'],
-                    new_values,
-                    datetime.now(timezone.utc)
-                ))
-            except Exception as log_error:
-                logger.warning(f"[PATIENT_CREATE] Failed to log patient creation: {log_error}")
+        # id_number and medical_aid_number are UNIQUE: the INSERT itself is the
+        # duplicate check, with no lookup beforehand and no race between the two
+        try:
+            with DatabaseManager.pooled_cursor() as cursor:
+                cursor.execute(insert_query, insert_values)
+                new_patient_id = cursor.lastrowid
+        except IntegrityError as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                logger.error(f"[PATIENT_CREATE] Insert rejected: {e}")
+                return jsonify({'success': False, 'error': 'Failed to create patient'}), 500
+            match = PATIENT_DUPLICATE_KEY_RE.search(e.msg or '')
+            error = PATIENT_UNIQUE_KEY_ERRORS.get(match.group(1)) if match else None
+            if error is None:
+                logger.warning(f"[PATIENT_CREATE] Duplicate on unexpected key: {e.msg}")
+                error = 'Patient already exists'
+            return jsonify({'success': False, 'error': error}), 409
+        except Error as e:
+            logger.error(f"[PATIENT_CREATE] Insert failed: {e}")
+            new_patient_id = None
+        
+        if new_patient_id:
+            audit_log(request.current_user['id'], 'patients', 'INSERT', record_id=new_patient_id, new_values={
+                'first_name': data['first_name'],
+                'last_name': data['last_name'],
+                'medical_aid_number': data.get('medical_aid_number')
+            })
             
-            logger.info(f"[PATIENT_CREATE] Patient created successfully by user {request.current_user.get('email')}, affected rows: {result}")
+            logger.info("[PATIENT_CREATE] Patient created successfully by user %s", request.current_user.get('email'))
             
             return jsonify({
                 'success': True,
                 'message': 'Patient created successfully',
-                'patient_id': result
+                'patient_id': new_patient_id
             }), 201
         else:
             logger.error("[PATIENT_CREATE] Database insert failed - no rows affected")
@@ -739,6 +1706,31 @@ def create_patient():
         logger.error(f"[PATIENT_CREATE] Unexpected error: {e}", exc_info=True)
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
         
+# system_settings values change rarely (by an administrator, in SQL), so
+# they are cached in-process and re-read after SETTINGS_CACHE_TTL seconds.
+SETTINGS_CACHE_TTL = int(os.environ.get('SETTINGS_CACHE_TTL', 300))
+
+_settings_cache = TTLCache(maxsize=64, ttl=SETTINGS_CACHE_TTL)
+_settings_cache_lock = threading.Lock()
+_SETTING_MISSING = object()
+
+def get_system_setting(setting_key: str) -> Optional[str]:
+    """Return system_settings.setting_value for setting_key, or None if it is not set"""
+    with _settings_cache_lock:
+        value = _settings_cache.get(setting_key, _SETTING_MISSING)
+    if value is _SETTING_MISSING:
+        rows = DatabaseManager.execute_query(
+            "SELECT setting_value FROM system_settings WHERE setting_key = %s",
+            (setting_key,),
+            fetch=True,
+        )
+        if rows is None:
+            return None
+        value = rows[0]['setting_value'] if rows else None
+        with _settings_cache_lock:
+            _settings_cache[setting_key] = value
+    return value
+
 @app.route('/api/patients/<int:patient_id>/visits', methods=['POST'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse'])
@@ -748,89 +1740,42 @@ def create_patient_visit(patient_id: int):
         data = request.get_json(silent=True) or {}
 
         # Accept optional values, otherwise default to current date/time
-        visit_date = data.get('visit_date') or datetime.now(timezone.utc).date()
-        visit_time = data.get('visit_time') or datetime.now(timezone.utc).strftime('%H:%M:%S')
+        now = datetime.now(timezone.utc)
+        visit_date = data.get('visit_date') or now.date()
+        visit_time = data.get('visit_time') or now.strftime('%H:%M:%S')
         route_id = data.get('route_id')
         location = (data.get('location') or '').strip() or None
+        chief_complaint = data.get('chief_complaint')
 
         # Resolve province context for geographic validation
-        user_record = request.current_user or {}
-        user_geo = user_record.get('geographic_restrictions')
-        allowed_provinces = []
-        try:
-            if user_geo:
-                allowed_provinces = json.loads(user_geo)
-        except Exception:
-            allowed_provinces = []
-
-        route_province = None
-        if route_id:
-            r = DatabaseManager.execute_query(
-                "SELECT province FROM routes WHERE id = %s",
-                (route_id,),
-                fetch=True,
-            )
-            if r:
-                route_province = r[0].get('province')
-
-        # Choose an effective province: prefer route province, else first allowed, else system default
-        effective_province = route_province
-        if not effective_province and allowed_provinces:
-            effective_province = allowed_provinces[0]
-        if not effective_province:
-            s = DatabaseManager.execute_query(
-                "SELECT setting_value FROM system_settings WHERE setting_key = 'default_province'",
-                fetch=True,
-            )
-            if s:
-                effective_province = s[0].get('setting_value')
-
-        # If a route is selected but the user lacks access to its province, reject early with 403
-        if route_province and allowed_provinces and route_province not in allowed_provinces:
-            return jsonify({'success': False, 'error': f'You do not have geographic access to {route_province}'}), 403
-
-        # If no explicit location, set a generic location including province suffix that the trigger expects
-        if not location and effective_province:
-            location = f"Clinic Visit, {effective_province}"
-        chief_complaint = data.get('chief_complaint')
+        allowed_provinces = (request.current_user or {}).get('allowed_provinces') or ()
+
+        # Route province lookup, geographic check and INSERT run server-side
+        # in one call (migration 16). The default province is only needed
+        # when the user has no restrictions, and then comes from the cache.
+        fallback_province = None if allowed_provinces else get_system_setting('default_province')
+        result_sets = DatabaseManager.call_proc('sp_create_patient_visit', (
+            patient_id,
+            visit_date,
+            visit_time,
+            route_id or None,
+            location,
+            chief_complaint,
+            request.current_user['id'],
+            json.dumps(list(allowed_provinces)) if allowed_provinces else None,
+            fallback_province
+        ))
+        outcome = result_sets[0][0] if result_sets and result_sets[0] else {}
 
-        insert_query = """
-        INSERT INTO patient_visits (
-            patient_id, visit_date, visit_time, route_id, location, chief_complaint, current_stage_id, created_by
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
+        # The route lies outside the user's provinces
+        if outcome.get('result') == 'FORBIDDEN':
+            return jsonify({'success': False, 'error': f"You do not have geographic access to {outcome['province']}"}), 403
 
-        # current_stage_id is optional; leave NULL by default
-        result = DatabaseManager.execute_query(
-            insert_query,
-            (
-                patient_id,
-                visit_date,
-                visit_time,
-                route_id,
-                location,
-                chief_complaint,
-                None,  # current_stage_id
-                request.current_user['id']
-            )
-        )
+        new_visit_id = outcome.get('visit_id')
 
-        if not result:
+        if not new_visit_id:
             return jsonify({'success': False, 'error': 'Failed to create visit'}), 500
 
-        # Retrieve the newly created visit id (best-effort)
-        sel = DatabaseManager.execute_query(
-            """
-            SELECT id FROM patient_visits
-            WHERE patient_id = %s AND created_by = %s
-            ORDER BY id DESC
-            LIMIT 1
-            """,
-            (patient_id, request.current_user['id']),
-            fetch=True,
-        )
-        new_visit_id = sel[0]['id'] if sel else None
-
         return jsonify({
             'success': True,
             'message': 'Visit created successfully',
@@ -879,46 +1824,50 @@ def add_vital_signs(visit_id: int):
         if respiratory_rate is not None:
             additional['respiratory_rate'] = respiratory_rate
 
-        ok = DatabaseManager.execute_query(
-            """
-            INSERT INTO vital_signs (
-                visit_id, recorded_by, systolic_bp, diastolic_bp, heart_rate, temperature,
-                weight, height, oxygen_saturation, blood_glucose, additional_measurements
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            (
-                visit_id,
-                request.current_user['id'],
-                systolic_bp,
-                diastolic_bp,
-                heart_rate,
-                temperature,
-                weight,
-                height,
-                oxygen_saturation,
-                blood_glucose,
-                json.dumps(additional) if additional else None,
-            ),
-            fetch=False,
-        )
+        nursing_notes = (data.get('nursing_notes') or '').strip()
 
-        if not ok:
+        # Vitals and the optional nursing assessment note commit together, on
+        # one connection, so a visit never ends up with only half of the record
+        try:
+            with DatabaseManager.pooled_cursor(commit=True) as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO vital_signs (
+                        visit_id, recorded_by, systolic_bp, diastolic_bp, heart_rate, temperature,
+                        weight, height, oxygen_saturation, blood_glucose, additional_measurements
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    (
+                        visit_id,
+                        request.current_user['id'],
+                        systolic_bp,
+                        diastolic_bp,
+                        heart_rate,
+                        temperature,
+                        weight,
+                        height,
+                        oxygen_saturation,
+                        blood_glucose,
+                        json.dumps(additional) if additional else None,
+                    )
+                )
+                vital_signs_id = cursor.lastrowid
+
+                # Optional nursing assessment note
+                if nursing_notes:
+                    cursor.execute(
+                        """
+                        INSERT INTO clinical_notes (
+                            visit_id, note_type, content, created_by
+                        ) VALUES (%s, 'Assessment', %s, %s)
+                        """,
+                        (visit_id, nursing_notes, request.current_user['id'])
+                    )
+        except Error as e:
+            logger.error(f"Add vital signs transaction failed: {e}")
             return jsonify({'success': False, 'error': 'Failed to record vital signs'}), 500
 
-        # Optional nursing assessment note
-        nursing_notes = (data.get('nursing_notes') or '').strip()
-        if nursing_notes:
-            DatabaseManager.execute_query(
-                """
-                INSERT INTO clinical_notes (
-                    visit_id, note_type, content, created_by
-                ) VALUES (%s, 'Assessment', %s, %s)
-                """,
-                (visit_id, nursing_notes, request.current_user['id']),
-                fetch=False,
-            )
-
-        return jsonify({'success': True, 'message': 'Vital signs recorded'}), 201
+        return jsonify({'success': True, 'message': 'Vital signs recorded', 'vital_signs_id': vital_signs_id}), 201
 
     except Exception as e:
         logger.error(f"Add vital signs error: {e}", exc_info=True)
@@ -941,8 +1890,8 @@ def get_latest_visit(patient_id: int):
             (patient_id,),
             fetch=True,
         )
-        payload = _to_jsonable(row[0]) if row else None
-        return jsonify({'success': True, 'data': payload}), 200
+        payload = row[0] if row else None
+        return iso_jsonify({'success': True, 'data': payload}), 200
     except Exception as e:
         logger.error(f"Get latest visit error: {e}", exc_info=True)
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
@@ -953,40 +1902,31 @@ def get_latest_visit(patient_id: int):
 def get_visit_vitals(visit_id: int):
     """Return vitals summary for a visit (count and latest record)."""
     try:
-        summary = DatabaseManager.execute_query(
-            "SELECT COUNT(*) AS count FROM vital_signs WHERE visit_id = %s",
-            (visit_id,),
-            fetch=True,
-        )
-        latest = DatabaseManager.execute_query(
+        # Count, latest record and last non-null Pulse/Temp (so the UI can show
+        # them even when the latest entry omitted them) in one round trip
+        result_sets = DatabaseManager.execute_multi(
             """
+            SELECT COUNT(*) AS count FROM vital_signs WHERE visit_id = %s;
             SELECT id, recorded_at, systolic_bp, diastolic_bp, heart_rate, temperature,
                    weight, height, oxygen_saturation, blood_glucose
             FROM vital_signs
             WHERE visit_id = %s
             ORDER BY id DESC
-            LIMIT 1
-            """,
-            (visit_id,),
-            fetch=True,
-        )
-        # Provide last non-null values to help the UI display Pulse/Temp even when the latest entry omitted them
-        last_non_null = DatabaseManager.execute_query(
-            """
+            LIMIT 1;
             SELECT
                 (SELECT heart_rate  FROM vital_signs WHERE visit_id = %s AND heart_rate  IS NOT NULL ORDER BY id DESC LIMIT 1) AS heart_rate,
                 (SELECT temperature FROM vital_signs WHERE visit_id = %s AND temperature IS NOT NULL ORDER BY id DESC LIMIT 1) AS temperature
             """,
-            (visit_id, visit_id),
-            fetch=True,
+            (visit_id, visit_id, visit_id, visit_id),
         )
-        last_non_null_payload = _to_jsonable(last_non_null[0]) if last_non_null else None
+        summary, latest, last_non_null = result_sets or (None, None, None)
+        last_non_null_payload = last_non_null[0] if last_non_null else None
         payload = {
             'count': (summary[0]['count'] if summary else 0),
-            'latest': (_to_jsonable(latest[0]) if latest else None),
+            'latest': (latest[0] if latest else None),
             'last_non_null': last_non_null_payload,
         }
-        return jsonify({'success': True, 'data': payload}), 200
+        return iso_jsonify({'success': True, 'data': payload}), 200
     except Exception as e:
         logger.error(f"Get visit vitals error: {e}", exc_info=True)
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
@@ -1022,10 +1962,10 @@ def get_routes():
                 ELSE 'mixed'
             END AS location_type,
             -- Representative location and times from associated route locations (if any)
-            COALESCE(MIN(l.location_name), r.province) AS location,
+            COALESCE((SELECT MIN(l.location_name) FROM route_locations rl JOIN locations l ON rl.location_id = l.id WHERE rl.route_id = r.id), r.province) AS location,
             r.start_date AS scheduled_date,
-            MIN(rl.start_time) AS start_time,
-            MAX(rl.end_time) AS end_time,
+            (SELECT MIN(rl.start_time) FROM route_locations rl WHERE rl.route_id = r.id) AS start_time,
+            (SELECT MAX(rl.end_time) FROM route_locations rl WHERE rl.route_id = r.id) AS end_time,
             r.max_appointments_per_day AS max_appointments,
             CASE 
                 WHEN r.is_active = TRUE AND CURDATE() BETWEEN r.start_date AND r.end_date THEN 'active'
@@ -1035,13 +1975,18 @@ def get_routes():
                 ELSE 'draft'
             END AS status,
             u.first_name, u.last_name,
-            COUNT(a.id) as total_appointments,
-            COUNT(CASE WHEN a.status = 'Booked' THEN 1 END) as booked_appointments
+            -- Per-route counts resolved on appointments(route_location_id, status, ...)
+            -- instead of joining every appointment row and grouping afterwards
+            (SELECT COUNT(*)
+             FROM route_locations rl
+             JOIN appointments a ON a.route_location_id = rl.id
+             WHERE rl.route_id = r.id) AS total_appointments,
+            (SELECT COUNT(*)
+             FROM route_locations rl
+             JOIN appointments a ON a.route_location_id = rl.id AND a.status = 'Booked'
+             WHERE rl.route_id = r.id) AS booked_appointments
         FROM routes r
         LEFT JOIN users u ON r.created_by = u.id
-        LEFT JOIN route_locations rl ON r.id = rl.route_id
-        LEFT JOIN locations l ON rl.location_id = l.id
-        LEFT JOIN appointments a ON rl.id = a.route_location_id
         WHERE r.is_active = TRUE
         """
         
@@ -1062,19 +2007,13 @@ def get_routes():
         # Role-based filtering
         user_role = request.current_user.get('role_name')
         if user_role == 'doctor':
-            geographic_restrictions = request.current_user.get('geographic_restrictions')
-            if geographic_restrictions:
-                try:
-                    import json
-                    provinces = json.loads(geographic_restrictions)
-                    if provinces and len(provinces) > 0:
-                        province_placeholders = ','.join(['%s'] * len(provinces))
-                        query += f" AND r.province IN ({province_placeholders})"
-                        params.extend(provinces)
-                except:
-                    pass
+            provinces = request.current_user.get('allowed_provinces')
+            if provinces:
+                province_placeholders = ','.join(['%s'] * len(provinces))
+                query += f" AND r.province IN ({province_placeholders})"
+                params.extend(provinces)
         
-        query += " GROUP BY r.id ORDER BY r.start_date DESC"
+        query += " ORDER BY r.start_date DESC"
         
         routes = DatabaseManager.execute_query(query, tuple(params), fetch=True)
         
@@ -1087,6 +2026,15 @@ def get_routes():
         logger.error(f"Get routes error: {e}")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
+ROUTE_TYPES = frozenset({'Police Stations', 'Schools', 'Community Centers', 'Mixed'})
+
+# UI location_type -> routes.route_type (inverse of the CASE in the route queries)
+LOCATION_TYPE_TO_ROUTE_TYPE = {
+    'police_station': 'Police Stations',
+    'school': 'Schools',
+    'community_center': 'Community Centers',
+}
+
 @app.route('/api/routes', methods=['POST'])
 @token_required
 @role_required(['administrator', 'doctor'])
@@ -1104,20 +2052,12 @@ def create_route():
 
         # Derive route_type or default
         route_type_input = (data.get('route_type') or '').strip()
-        valid_types = ['Police Stations', 'Schools', 'Community Centers', 'Mixed']
-        if route_type_input in valid_types:
+        if route_type_input in ROUTE_TYPES:
             route_type = route_type_input
         else:
             # Try to infer from a provided location_type
             lt = (data.get('location_type') or '').strip().lower()
-            if lt == 'police_station':
-                route_type = 'Police Stations'
-            elif lt == 'school':
-                route_type = 'Schools'
-            elif lt == 'community_center':
-                route_type = 'Community Centers'
-            else:
-                route_type = 'Mixed'
+            route_type = LOCATION_TYPE_TO_ROUTE_TYPE.get(lt, 'Mixed')
 
         # Basic validation
         missing = []
@@ -1137,25 +2077,17 @@ def create_route():
             """
         )
         user_id = request.current_user.get('id')
-        result = DatabaseManager.execute_query(
+        new_id = DatabaseManager.execute_query(
             insert_sql,
             (route_name, description, start_date, end_date, province, route_type, max_per_day, user_id),
-            fetch=False,
+            return_lastrowid=True,
         )
 
-        logger.info(f"Insert routes rowcount: {result}")
+        logger.debug("Inserted route id: %s", new_id)
 
-        if not result:
+        if not new_id:
             return jsonify({'success': False, 'error': 'Failed to create route'}), 500
 
-        # Best-effort fetch of the inserted id (no reliance on LAST_INSERT_ID across connections)
-        sel = DatabaseManager.execute_query(
-            "SELECT id FROM routes WHERE route_name = %s AND created_by = %s ORDER BY id DESC LIMIT 1",
-            (route_name, user_id),
-            fetch=True,
-        )
-        new_id = sel[0]['id'] if sel else None
-
         # Return a UI-friendly record similar to GET /api/routes
         route_row = DatabaseManager.execute_query(
             """
@@ -1190,7 +2122,8 @@ def create_route():
             fetch=True,
         )
 
-        logger.info(f"Route created successfully with id={new_id}, name={route_name}, province={province}, type={route_type}")
+        logger.info("Route created successfully with id=%s, name=%s, province=%s, type=%s",
+                    new_id, route_name, province, route_type)
         return jsonify({'success': True, 'data': route_row[0] if route_row else {'id': new_id}}), 201
 
     except Exception as e:
@@ -1201,6 +2134,8 @@ def create_route():
 # REFERRAL MANAGEMENT ENDPOINTS
 # ============================================================================
 
+REFERRAL_STATUSES = frozenset({'pending', 'sent', 'accepted', 'completed', 'cancelled'})
+
 @app.route('/api/patients/<int:patient_id>/referrals', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse', 'clerk', 'social_work', 'social_worker'])
@@ -1260,14 +2195,14 @@ def create_referral(patient_id: int):
             INSERT INTO referrals
             (patient_id, visit_id, referral_type, from_stage, to_stage, external_provider, department,
              reason, notes, status, appointment_date, created_by, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending', %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending', %s, %s, UTC_TIMESTAMP())
             """,
             (
                 patient_id, visit_id,
                 'external' if referral_type == 'external' else 'internal',
                 from_stage, to_stage, external_provider, department,
                 reason, notes, appointment_date,
-                request.current_user['id'], datetime.now(timezone.utc),
+                request.current_user['id'],
             ),
             fetch=False,
         )
@@ -1371,7 +2306,7 @@ def update_referral(referral_id: int):
 
         status = data.get('status')
         if status:
-            if status not in ['pending','sent','accepted','completed','cancelled']:
+            if status not in REFERRAL_STATUSES:
                 return jsonify({'success': False, 'error': 'Invalid status'}), 400
             sets.append("status = %s"); params.append(status)
 
@@ -1389,7 +2324,7 @@ def update_referral(referral_id: int):
         if not sets:
             return jsonify({'success': False, 'error': 'No changes provided'}), 400
 
-        sets.append("updated_at = %s"); params.append(datetime.now(timezone.utc))
+        sets.append("updated_at = UTC_TIMESTAMP()")
         params.append(referral_id)
 
         ok = DatabaseManager.execute_query(
@@ -1429,9 +2364,8 @@ def update_referral(referral_id: int):
 def get_dashboard_stats():
     """Get role-specific dashboard statistics"""
     try:
-        # Get user role and normalize it
-        raw_role = (request.current_user or {}).get('role_name', '')
-        user_role = str(raw_role).strip().lower().replace(' ', '_')
+        # Role is normalized once by token_required
+        user_role = request.current_user['role_key']
         user_id = request.current_user.get('id')
 
         # Base stats structure
@@ -1449,208 +2383,140 @@ def get_dashboard_stats():
             'roleSpecificMetrics': {}
         }
 
+        # Every counter below is an independent read, so they are collected
+        # first and run concurrently; latency is the slowest query, not the sum.
+        queries = {}
+
         # Role-specific metrics with proper queries
         if user_role == 'clerk':
             # Clerk: Track registrations and appointment bookings
-            reg_stats = DatabaseManager.execute_query(
+            queries['registrations'] = (
                 """
                 SELECT 
-                    COUNT(CASE WHEN DATE(p.created_at) = CURDATE() THEN 1 END) AS today_registrations,
-                    COUNT(CASE WHEN DATE(p.created_at) >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS week_registrations,
-                    COUNT(CASE WHEN DATE(p.created_at) >= CURDATE() - INTERVAL 30 DAY THEN 1 END) AS month_registrations
+                    COUNT(CASE WHEN p.created_at >= CURDATE() AND p.created_at < CURDATE() + INTERVAL 1 DAY THEN 1 END) AS today_registrations,
+                    COUNT(CASE WHEN p.created_at >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS week_registrations,
+                    COUNT(*) AS month_registrations
                 FROM patients p
-                WHERE p.created_by = %s
+                WHERE p.created_by = %s AND p.created_at >= CURDATE() - INTERVAL 30 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            booking_stats = DatabaseManager.execute_query(
+            queries['bookings'] = (
                 """
                 SELECT 
-                    COUNT(CASE WHEN DATE(a.booked_at) = CURDATE() AND a.status = 'Booked' THEN 1 END) AS today_bookings,
-                    COUNT(CASE WHEN DATE(a.booked_at) >= CURDATE() - INTERVAL 7 DAY AND a.status = 'Booked' THEN 1 END) AS week_bookings,
-                    COUNT(CASE WHEN DATE(a.booked_at) >= CURDATE() - INTERVAL 30 DAY AND a.status = 'Booked' THEN 1 END) AS month_bookings
+                    COUNT(CASE WHEN a.booked_at >= CURDATE() AND a.booked_at < CURDATE() + INTERVAL 1 DAY THEN 1 END) AS today_bookings,
+                    COUNT(CASE WHEN a.booked_at >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS week_bookings,
+                    COUNT(*) AS month_bookings
                 FROM appointments a
+                WHERE a.status = 'Booked' AND a.booked_at >= CURDATE() - INTERVAL 30 DAY
                 """,
-                fetch=True,
+                None,
             )
-            
-            reg_data = reg_stats[0] if reg_stats else {}
-            booking_data = booking_stats[0] if booking_stats else {}
-            
-            stats['todayPatients'] = int(reg_data.get('today_registrations', 0))
-            stats['weeklyPatients'] = int(reg_data.get('week_registrations', 0))
-            stats['monthlyPatients'] = int(reg_data.get('month_registrations', 0))
-            
-            stats['roleSpecificMetrics'] = {
-                'todayBookings': int(booking_data.get('today_bookings', 0)),
-                'weekBookings': int(booking_data.get('week_bookings', 0)),
-                'monthBookings': int(booking_data.get('month_bookings', 0)),
-                'metricType': 'registrations'
-            }
 
         elif user_role == 'nurse':
             # Nurse: Track vital signs and nursing assessments
-            vitals_stats = DatabaseManager.execute_query(
+            queries['vitals'] = (
                 """
                 SELECT 
-                    COUNT(CASE WHEN DATE(vs.recorded_at) = CURDATE() THEN 1 END) AS today_vitals,
-                    COUNT(CASE WHEN DATE(vs.recorded_at) >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS week_vitals,
-                    COUNT(CASE WHEN DATE(vs.recorded_at) >= CURDATE() - INTERVAL 30 DAY THEN 1 END) AS month_vitals
+                    COUNT(CASE WHEN vs.recorded_at >= CURDATE() AND vs.recorded_at < CURDATE() + INTERVAL 1 DAY THEN 1 END) AS today_vitals,
+                    COUNT(CASE WHEN vs.recorded_at >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS week_vitals,
+                    COUNT(*) AS month_vitals
                 FROM vital_signs vs
-                WHERE vs.recorded_by = %s
+                WHERE vs.recorded_by = %s AND vs.recorded_at >= CURDATE() - INTERVAL 30 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            assessment_stats = DatabaseManager.execute_query(
+            queries['assessments'] = (
                 """
                 SELECT 
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) = CURDATE() THEN cn.visit_id END) AS today_assessments,
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) >= CURDATE() - INTERVAL 7 DAY THEN cn.visit_id END) AS week_assessments,
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) >= CURDATE() - INTERVAL 30 DAY THEN cn.visit_id END) AS month_assessments
+                    COUNT(DISTINCT CASE WHEN cn.created_at >= CURDATE() AND cn.created_at < CURDATE() + INTERVAL 1 DAY THEN cn.visit_id END) AS today_assessments,
+                    COUNT(DISTINCT CASE WHEN cn.created_at >= CURDATE() - INTERVAL 7 DAY THEN cn.visit_id END) AS week_assessments,
+                    COUNT(DISTINCT cn.visit_id) AS month_assessments
                 FROM clinical_notes cn
-                WHERE cn.created_by = %s AND cn.note_type = 'Assessment'
+                WHERE cn.created_by = %s AND cn.note_type = 'Assessment' AND cn.created_at >= CURDATE() - INTERVAL 30 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            vitals_data = vitals_stats[0] if vitals_stats else {}
-            assessment_data = assessment_stats[0] if assessment_stats else {}
-            
-            stats['todayPatients'] = int(vitals_data.get('today_vitals', 0))
-            stats['weeklyPatients'] = int(vitals_data.get('week_vitals', 0))
-            stats['monthlyPatients'] = int(vitals_data.get('month_vitals', 0))
-            
-            stats['roleSpecificMetrics'] = {
-                'todayAssessments': int(assessment_data.get('today_assessments', 0)),
-                'weekAssessments': int(assessment_data.get('week_assessments', 0)),
-                'monthAssessments': int(assessment_data.get('month_assessments', 0)),
-                'metricType': 'vitals'
-            }
 
         elif user_role == 'doctor':
             # Doctor: Track diagnoses and treatments
-            clinical_stats = DatabaseManager.execute_query(
+            queries['clinical'] = (
                 """
                 SELECT 
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) = CURDATE() THEN cn.visit_id END) AS today_clinical,
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) >= CURDATE() - INTERVAL 7 DAY THEN cn.visit_id END) AS week_clinical,
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) >= CURDATE() - INTERVAL 30 DAY THEN cn.visit_id END) AS month_clinical
+                    COUNT(DISTINCT CASE WHEN cn.created_at >= CURDATE() AND cn.created_at < CURDATE() + INTERVAL 1 DAY THEN cn.visit_id END) AS today_clinical,
+                    COUNT(DISTINCT CASE WHEN cn.created_at >= CURDATE() - INTERVAL 7 DAY THEN cn.visit_id END) AS week_clinical,
+                    COUNT(DISTINCT cn.visit_id) AS month_clinical
                 FROM clinical_notes cn
-                WHERE cn.created_by = %s AND cn.note_type IN ('Diagnosis', 'Treatment')
+                WHERE cn.created_by = %s AND cn.note_type IN ('Diagnosis', 'Treatment') AND cn.created_at >= CURDATE() - INTERVAL 30 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            diagnosis_stats = DatabaseManager.execute_query(
+            queries['diagnoses'] = (
                 """
                 SELECT 
-                    COUNT(CASE WHEN DATE(cn.created_at) = CURDATE() AND cn.note_type = 'Diagnosis' THEN 1 END) AS today_diagnosis,
-                    COUNT(CASE WHEN DATE(cn.created_at) = CURDATE() AND cn.note_type = 'Treatment' THEN 1 END) AS today_treatment
+                    COUNT(CASE WHEN cn.note_type = 'Diagnosis' THEN 1 END) AS today_diagnosis,
+                    COUNT(CASE WHEN cn.note_type = 'Treatment' THEN 1 END) AS today_treatment
                 FROM clinical_notes cn
-                WHERE cn.created_by = %s
+                WHERE cn.created_by = %s AND cn.note_type IN ('Diagnosis', 'Treatment')
+                AND cn.created_at >= CURDATE() AND cn.created_at < CURDATE() + INTERVAL 1 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            clinical_data = clinical_stats[0] if clinical_stats else {}
-            diagnosis_data = diagnosis_stats[0] if diagnosis_stats else {}
-            
-            stats['todayPatients'] = int(clinical_data.get('today_clinical', 0))
-            stats['weeklyPatients'] = int(clinical_data.get('week_clinical', 0))
-            stats['monthlyPatients'] = int(clinical_data.get('month_clinical', 0))
-            
-            stats['roleSpecificMetrics'] = {
-                'todayDiagnoses': int(diagnosis_data.get('today_diagnosis', 0)),
-                'todayTreatments': int(diagnosis_data.get('today_treatment', 0)),
-                'metricType': 'clinical'
-            }
 
         elif user_role == 'social_worker':
             # Social Worker: Track counseling sessions and referrals
-            counseling_stats = DatabaseManager.execute_query(
+            queries['counseling'] = (
                 """
                 SELECT 
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) = CURDATE() THEN cn.visit_id END) AS today_counseling,
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) >= CURDATE() - INTERVAL 7 DAY THEN cn.visit_id END) AS week_counseling,
-                    COUNT(DISTINCT CASE WHEN DATE(cn.created_at) >= CURDATE() - INTERVAL 30 DAY THEN cn.visit_id END) AS month_counseling
+                    COUNT(DISTINCT CASE WHEN cn.created_at >= CURDATE() AND cn.created_at < CURDATE() + INTERVAL 1 DAY THEN cn.visit_id END) AS today_counseling,
+                    COUNT(DISTINCT CASE WHEN cn.created_at >= CURDATE() - INTERVAL 7 DAY THEN cn.visit_id END) AS week_counseling,
+                    COUNT(DISTINCT cn.visit_id) AS month_counseling
                 FROM clinical_notes cn
-                WHERE cn.created_by = %s AND cn.note_type IN ('Counseling', 'Referral')
+                WHERE cn.created_by = %s AND cn.note_type IN ('Counseling', 'Referral') AND cn.created_at >= CURDATE() - INTERVAL 30 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            referral_stats = DatabaseManager.execute_query(
+            queries['referrals'] = (
                 """
                 SELECT 
-                    COUNT(CASE WHEN DATE(r.created_at) = CURDATE() THEN 1 END) AS today_referrals,
-                    COUNT(CASE WHEN DATE(r.created_at) >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS week_referrals
+                    COUNT(CASE WHEN r.created_at >= CURDATE() AND r.created_at < CURDATE() + INTERVAL 1 DAY THEN 1 END) AS today_referrals,
+                    COUNT(*) AS week_referrals
                 FROM referrals r
-                WHERE r.created_by = %s
+                WHERE r.created_by = %s AND r.created_at >= CURDATE() - INTERVAL 7 DAY
                 """,
                 (user_id,),
-                fetch=True,
             )
-            
-            counseling_data = counseling_stats[0] if counseling_stats else {}
-            referral_data = referral_stats[0] if referral_stats else {}
-            
-            stats['todayPatients'] = int(counseling_data.get('today_counseling', 0))
-            stats['weeklyPatients'] = int(counseling_data.get('week_counseling', 0))
-            stats['monthlyPatients'] = int(counseling_data.get('month_counseling', 0))
-            
-            stats['roleSpecificMetrics'] = {
-                'todayReferrals': int(referral_data.get('today_referrals', 0)),
-                'weekReferrals': int(referral_data.get('week_referrals', 0)),
-                'metricType': 'counseling'
-            }
 
         else:
             # Administrator or unknown role: Overall system metrics
-            system_stats = DatabaseManager.execute_query(
+            queries['system'] = (
                 """
                 SELECT 
                     COUNT(CASE WHEN visit_date = CURDATE() THEN 1 END) AS visits_today,
                     COUNT(CASE WHEN visit_date >= CURDATE() - INTERVAL 7 DAY THEN 1 END) AS visits_7d,
-                    COUNT(CASE WHEN visit_date >= CURDATE() - INTERVAL 30 DAY THEN 1 END) AS visits_30d
+                    COUNT(*) AS visits_30d
                 FROM patient_visits
+                WHERE visit_date >= CURDATE() - INTERVAL 30 DAY
                 """,
-                fetch=True,
+                None,
             )
-            
-            system_data = system_stats[0] if system_stats else {}
-            stats['todayPatients'] = int(system_data.get('visits_today', 0))
-            stats['weeklyPatients'] = int(system_data.get('visits_7d', 0))
-            stats['monthlyPatients'] = int(system_data.get('visits_30d', 0))
-            
-            stats['roleSpecificMetrics'] = {
-                'metricType': 'system_overview'
-            }
 
         # Common metrics for all roles
         
         # Pending appointments for today
-        pending_appointments = DatabaseManager.execute_query(
+        queries['pending_appointments'] = (
             """
             SELECT COUNT(*) AS pending
             FROM appointments a
             JOIN route_locations rl ON a.route_location_id = rl.id
             WHERE rl.visit_date = CURDATE() AND a.status = 'Booked'
             """,
-            fetch=True,
+            None,
         )
-        stats['pendingAppointments'] = int((pending_appointments or [{}])[0].get('pending') or 0)
 
         # Completed workflows (user-specific for non-admins)
         if user_role != 'administrator':
-            completed_wf = DatabaseManager.execute_query(
+            queries['completed_workflows'] = (
                 """
                 SELECT COUNT(*) AS completed
                 FROM visit_workflow_progress vwp
@@ -1659,57 +2525,51 @@ def get_dashboard_stats():
                 AND vwp.completed_at >= DATE_FORMAT(CURDATE(), '%Y-%m-01')
                 """,
                 (user_id,),
-                fetch=True,
             )
         else:
-            completed_wf = DatabaseManager.execute_query(
+            queries['completed_workflows'] = (
                 """
                 SELECT COUNT(*) AS completed
                 FROM visit_workflow_progress
                 WHERE is_completed = TRUE
                 AND completed_at >= DATE_FORMAT(CURDATE(), '%Y-%m-01')
                 """,
-                fetch=True,
+                None,
             )
-        stats['completedWorkflows'] = int((completed_wf or [{}])[0].get('completed') or 0)
 
         # Active routes
-        active_routes = DatabaseManager.execute_query(
+        queries['active_routes'] = (
             """
             SELECT COUNT(*) AS active
             FROM routes
             WHERE is_active = TRUE AND CURDATE() BETWEEN start_date AND end_date
             """,
-            fetch=True,
+            None,
         )
-        stats['activeRoutes'] = int((active_routes or [{}])[0].get('active') or 0)
 
         # Inventory alerts (only for relevant roles)
         if user_role in ['administrator', 'doctor', 'nurse']:
-            low_stock = DatabaseManager.execute_query(
+            queries['low_stock'] = (
                 """
                 SELECT COUNT(*) AS low_stock
                 FROM inventory_stock s
                 JOIN consumables c ON s.consumable_id = c.id
                 WHERE s.quantity_current <= c.reorder_level
                 """,
-                fetch=True,
+                None,
             )
-            stats['lowStockAlerts'] = int((low_stock or [{}])[0].get('low_stock') or 0)
-
-            maintenance = DatabaseManager.execute_query(
+            queries['maintenance'] = (
                 """
                 SELECT COUNT(*) AS maintenance_alerts
                 FROM assets
                 WHERE status = 'Maintenance Required'
                    OR (next_maintenance_date IS NOT NULL AND next_maintenance_date <= CURDATE())
                 """,
-                fetch=True,
+                None,
             )
-            stats['maintenanceAlerts'] = int((maintenance or [{}])[0].get('maintenance_alerts') or 0)
 
         # Recent activity (user-specific)
-        recent_activity = DatabaseManager.execute_query(
+        queries['recent_activity'] = (
             """
             SELECT 
                 al.id,
@@ -1735,9 +2595,90 @@ def get_dashboard_stats():
             LIMIT 10
             """,
             (user_id,),
-            fetch=True,
         )
 
+        results = dict(zip(queries, DatabaseManager.execute_parallel(list(queries.values()))))
+
+        def first_row(name):
+            rows = results.get(name)
+            return rows[0] if rows else {}
+
+        if user_role == 'clerk':
+            reg_data = first_row('registrations')
+            booking_data = first_row('bookings')
+            
+            stats['todayPatients'] = int(reg_data.get('today_registrations', 0))
+            stats['weeklyPatients'] = int(reg_data.get('week_registrations', 0))
+            stats['monthlyPatients'] = int(reg_data.get('month_registrations', 0))
+            
+            stats['roleSpecificMetrics'] = {
+                'todayBookings': int(booking_data.get('today_bookings', 0)),
+                'weekBookings': int(booking_data.get('week_bookings', 0)),
+                'monthBookings': int(booking_data.get('month_bookings', 0)),
+                'metricType': 'registrations'
+            }
+
+        elif user_role == 'nurse':
+            vitals_data = first_row('vitals')
+            assessment_data = first_row('assessments')
+            
+            stats['todayPatients'] = int(vitals_data.get('today_vitals', 0))
+            stats['weeklyPatients'] = int(vitals_data.get('week_vitals', 0))
+            stats['monthlyPatients'] = int(vitals_data.get('month_vitals', 0))
+            
+            stats['roleSpecificMetrics'] = {
+                'todayAssessments': int(assessment_data.get('today_assessments', 0)),
+                'weekAssessments': int(assessment_data.get('week_assessments', 0)),
+                'monthAssessments': int(assessment_data.get('month_assessments', 0)),
+                'metricType': 'vitals'
+            }
+
+        elif user_role == 'doctor':
+            clinical_data = first_row('clinical')
+            diagnosis_data = first_row('diagnoses')
+            
+            stats['todayPatients'] = int(clinical_data.get('today_clinical', 0))
+            stats['weeklyPatients'] = int(clinical_data.get('week_clinical', 0))
+            stats['monthlyPatients'] = int(clinical_data.get('month_clinical', 0))
+            
+            stats['roleSpecificMetrics'] = {
+                'todayDiagnoses': int(diagnosis_data.get('today_diagnosis', 0)),
+                'todayTreatments': int(diagnosis_data.get('today_treatment', 0)),
+                'metricType': 'clinical'
+            }
+
+        elif user_role == 'social_worker':
+            counseling_data = first_row('counseling')
+            referral_data = first_row('referrals')
+            
+            stats['todayPatients'] = int(counseling_data.get('today_counseling', 0))
+            stats['weeklyPatients'] = int(counseling_data.get('week_counseling', 0))
+            stats['monthlyPatients'] = int(counseling_data.get('month_counseling', 0))
+            
+            stats['roleSpecificMetrics'] = {
+                'todayReferrals': int(referral_data.get('today_referrals', 0)),
+                'weekReferrals': int(referral_data.get('week_referrals', 0)),
+                'metricType': 'counseling'
+            }
+
+        else:
+            system_data = first_row('system')
+            stats['todayPatients'] = int(system_data.get('visits_today', 0))
+            stats['weeklyPatients'] = int(system_data.get('visits_7d', 0))
+            stats['monthlyPatients'] = int(system_data.get('visits_30d', 0))
+            
+            stats['roleSpecificMetrics'] = {
+                'metricType': 'system_overview'
+            }
+
+        stats['pendingAppointments'] = int(first_row('pending_appointments').get('pending') or 0)
+        stats['completedWorkflows'] = int(first_row('completed_workflows').get('completed') or 0)
+        stats['activeRoutes'] = int(first_row('active_routes').get('active') or 0)
+        if 'low_stock' in queries:
+            stats['lowStockAlerts'] = int(first_row('low_stock').get('low_stock') or 0)
+            stats['maintenanceAlerts'] = int(first_row('maintenance').get('maintenance_alerts') or 0)
+        recent_activity = results['recent_activity']
+
         stats['recentActivity'] = [
             {
                 'id': str(activity['id']),
@@ -1767,26 +2708,45 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
+@app.after_request
+def signal_pool_exhaustion(response):
+    """Turn a 500 caused by waiting out DB_POOL_TIMEOUT into 503 so clients back off and retry"""
+    if response.status_code == 500 and g.get('db_pool_exhausted'):
+        response = jsonify({'success': False, 'error': 'Service busy, please retry shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, int(DB_POOL_TIMEOUT)))
+    return response
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
 
+# Load balancers poll the health endpoint every few seconds; the database
+# probe result is reused for HEALTH_CACHE_TTL seconds so a burst of probes
+# costs one pool checkout.
+HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', 5))
+
+_health_cache = TTLCache(maxsize=1, ttl=HEALTH_CACHE_TTL)
+_health_cache_lock = threading.Lock()
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     try:
-        # Test database connection
-        connection = DatabaseManager.get_connection()
-        if connection:
-            connection.close()
-            db_status = 'healthy'
-        else:
-            db_status = 'unhealthy'
+        with _health_cache_lock:
+            db_status = _health_cache.get('database')
+        if db_status is None:
+            # The request's pooled connection is pinged on checkout and handed
+            # back at teardown, so there is no extra open/close here
+            connection = DatabaseManager.request_connection()
+            db_status = 'healthy' if connection is not None and connection.is_connected() else 'unhealthy'
+            with _health_cache_lock:
+                _health_cache['database'] = db_status
         
         return jsonify({
             'status': 'healthy' if db_status == 'healthy' else 'unhealthy',
             'database': db_status,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }), 200 if db_status == 'healthy' else 503
         
     except Exception as e:
@@ -1794,7 +2754,7 @@ def health_check():
         return jsonify({
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.now(timezone.utc).isoformat()
         }), 503
 
 # ============================================================================
@@ -1870,106 +2830,87 @@ def get_visit_workflow_status(visit_id: int):
     - File Closure (completed when a clinical_note of type Closure exists)
     """
     try:
-        # Visit metadata (for Registration timestamp)
-        visit_rows = DatabaseManager.execute_query(
+        # One round trip: visit metadata (Registration timestamp), vitals
+        # (Nursing) and the per-stage clinical note timestamps.
+        # Doctor Consultation only counts Diagnosis/Treatment notes by a Doctor,
+        # Counseling only Counseling notes by a Social Worker, and File Closure
+        # any Closure note regardless of role (typically doctor).
+        status_rows = DatabaseManager.execute_query(
             """
-            SELECT id, created_at
-            FROM patient_visits
-            WHERE id = %s
+            SELECT
+                pv.id,
+                pv.created_at,
+                vs.nursing_count,
+                vs.nursing_latest,
+                cn.doctor_latest,
+                cn.counseling_latest,
+                cn.closure_latest
+            FROM patient_visits pv
+            CROSS JOIN (
+                SELECT COUNT(*) AS nursing_count, MAX(recorded_at) AS nursing_latest
+                FROM vital_signs
+                WHERE visit_id = %s
+            ) vs
+            CROSS JOIN (
+                SELECT
+                    MAX(CASE WHEN cn.note_type IN ('Diagnosis','Treatment') AND ur.role_name = 'Doctor'
+                             THEN cn.created_at END) AS doctor_latest,
+                    MAX(CASE WHEN cn.note_type = 'Counseling' AND ur.role_name = 'Social Worker'
+                             THEN cn.created_at END) AS counseling_latest,
+                    MAX(CASE WHEN cn.note_type = 'Closure' THEN cn.created_at END) AS closure_latest
+                FROM clinical_notes cn
+                LEFT JOIN users u ON u.id = cn.created_by
+                LEFT JOIN user_roles ur ON ur.id = u.role_id
+                WHERE cn.visit_id = %s
+            ) cn
+            WHERE pv.id = %s
             """,
-            (visit_id,),
+            (visit_id, visit_id, visit_id),
             fetch=True,
         )
-        if not visit_rows:
+        if not status_rows:
             return jsonify({'success': False, 'error': 'Visit not found'}), 404
 
-        visit_created_at = visit_rows[0].get('created_at')
-
-        # Nursing: any vitals captured?
-        nursing = DatabaseManager.execute_query(
-            "SELECT COUNT(*) AS c, MAX(recorded_at) AS latest FROM vital_signs WHERE visit_id = %s",
-            (visit_id,),
-            fetch=True,
-        )
-        nursing_count = (nursing[0]['c'] if nursing else 0) or 0
-        nursing_latest = nursing[0].get('latest') if nursing else None
-
-        # Doctor Consultation: only count Diagnosis/Treatment notes created by a Doctor
-        doctor_row = DatabaseManager.execute_query(
-            """
-            SELECT MAX(cn.created_at) AS latest
-            FROM clinical_notes cn
-            JOIN users u ON u.id = cn.created_by
-            JOIN user_roles ur ON ur.id = u.role_id
-            WHERE cn.visit_id = %s
-                AND cn.note_type IN ('Diagnosis','Treatment')
-                AND ur.role_name = 'Doctor'
-            """,
-            (visit_id,),
-            fetch=True,
-        )
-        doctor_latest = doctor_row[0].get('latest') if doctor_row else None
+        status_row = status_rows[0]
+        visit_created_at = status_row.get('created_at')
+        nursing_count = status_row.get('nursing_count') or 0
+        nursing_latest = status_row.get('nursing_latest')
+        doctor_latest = status_row.get('doctor_latest')
         doctor_done = bool(doctor_latest)
-
-        # Counseling Session: only count Counseling notes created by a Social Worker
-        counseling_row = DatabaseManager.execute_query(
-            """
-            SELECT MAX(cn.created_at) AS latest
-            FROM clinical_notes cn
-            JOIN users u ON u.id = cn.created_by
-            JOIN user_roles ur ON ur.id = u.role_id
-            WHERE cn.visit_id = %s
-                AND cn.note_type = 'Counseling'
-                AND ur.role_name = 'Social Worker'
-            """,
-            (visit_id,),
-            fetch=True,
-        )
-        counseling_latest = counseling_row[0].get('latest') if counseling_row else None
+        counseling_latest = status_row.get('counseling_latest')
         counseling_done = bool(counseling_latest)
-
-        # File Closure: any Closure note regardless of role (typically doctor)
-        closure_row = DatabaseManager.execute_query(
-            """
-            SELECT MAX(created_at) AS latest
-            FROM clinical_notes
-            WHERE visit_id = %s AND note_type = 'Closure'
-            """,
-            (visit_id,),
-            fetch=True,
-        )
-        closure_latest = closure_row[0].get('latest') if closure_row else None
+        closure_latest = status_row.get('closure_latest')
         closure_done = bool(closure_latest)
 
         workflow = [
             {
                 'stage': 'Registration',
                 'completed': True,
-                'completed_at': _to_jsonable(visit_created_at),
+                'completed_at': visit_created_at,
             },
             {
                 'stage': 'Nursing Assessment',
                 'completed': nursing_count > 0,
-                'completed_at': _to_jsonable(nursing_latest) if nursing_count > 0 else None,
+                'completed_at': nursing_latest if nursing_count > 0 else None,
             },
             {
                 'stage': 'Doctor Consultation',
                 'completed': bool(doctor_done),
-                'completed_at': _to_jsonable(doctor_latest) if doctor_done else None,
+                'completed_at': doctor_latest if doctor_done else None,
             },
             {
                 'stage': 'Counseling Session',
                 'completed': bool(counseling_done),
-                'completed_at': _to_jsonable(counseling_latest) if counseling_done else None,
+                'completed_at': counseling_latest if counseling_done else None,
             },
             {
                 'stage': 'File Closure',
                 'completed': bool(closure_done),
-                'completed_at': _to_jsonable(closure_latest) if closure_done else None,
+                'completed_at': closure_latest if closure_done else None,
             },
         ]
 
-        return jsonify({'success': True, 'workflow': workflow}), 200
+        return iso_jsonify({'success': True, 'workflow': workflow}), 200
     except Exception as e:
         logger.error(f"Get workflow status error: {e}", exc_info=True)
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
@@ -1988,7 +2929,7 @@ def advance_workflow_stage(visit_id: int):
         if not current_stage_id:
             return jsonify({'success': False, 'error': 'current_stage_id is required'}), 400
         
-        connection = DatabaseManager.get_connection()
+        connection = DatabaseManager.request_connection()
         if not connection:
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
         
@@ -2024,7 +2965,6 @@ def advance_workflow_stage(visit_id: int):
                 
         finally:
             cursor.close()
-            connection.close()
         
     except Exception as e:
         logger.error(f"Advance workflow error: {e}")
@@ -2036,7 +2976,7 @@ def advance_workflow_stage(visit_id: int):
 def initialize_visit_workflow(visit_id: int):
     """Initialize workflow for a visit"""
     try:
-        connection = DatabaseManager.get_connection()
+        connection = DatabaseManager.request_connection()
         if not connection:
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
         
@@ -2066,7 +3006,6 @@ def initialize_visit_workflow(visit_id: int):
                 
         finally:
             cursor.close()
-            connection.close()
         
     except Exception as e:
         logger.error(f"Initialize workflow error: {e}")
@@ -2076,6 +3015,9 @@ def initialize_visit_workflow(visit_id: int):
 # CLINICAL NOTES ENDPOINTS
 # ============================================================================
 
+CLINICAL_NOTE_TYPES = ('Assessment', 'Diagnosis', 'Treatment', 'Referral', 'Counseling', 'Closure')
+_CLINICAL_NOTE_TYPE_SET = frozenset(CLINICAL_NOTE_TYPES)
+
 @app.route('/api/visits/<int:visit_id>/clinical-notes', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse', 'social_work', 'social_worker'])
@@ -2121,9 +3063,8 @@ def create_clinical_note(visit_id: int):
         if not note_type or not content:
             return jsonify({'success': False, 'error': 'note_type and content are required'}), 400
         
-        valid_note_types = ['Assessment', 'Diagnosis', 'Treatment', 'Referral', 'Counseling', 'Closure']
-        if note_type not in valid_note_types:
-            return jsonify({'success': False, 'error': f'note_type must be one of: {valid_note_types}'}), 400
+        if note_type not in _CLINICAL_NOTE_TYPE_SET:
+            return jsonify({'success': False, 'error': f'note_type must be one of: {list(CLINICAL_NOTE_TYPES)}'}), 400
         
         result = DatabaseManager.execute_query(
             """
@@ -2221,12 +3162,16 @@ def get_available_appointments():
         
         query += " ORDER BY rl.visit_date, a.appointment_time"
         
-        appointments = DatabaseManager.execute_query(query, tuple(params), fetch=True)
-        
-        return jsonify({
-            'success': True,
-            'appointments': appointments or []
-        }), 200
+        # Stream rows straight from a server-side cursor: a wide date range
+        # across provinces can return thousands of open slots.
+        appointments = DatabaseManager.iter_query(query, tuple(params), readonly=True,
+                                                  fetch_size=STREAM_CHUNK_ROWS)
+
+        return Response(
+            stream_with_context(stream_json_list('appointments', appointments)),
+            status=200,
+            mimetype='application/json'
+        )
         
     except Exception as e:
         logger.error(f"Get available appointments error: {e}")
@@ -2247,7 +3192,7 @@ def book_appointment(appointment_id: int):
         if not booked_by_name or not booked_by_phone:
             return jsonify({'success': False, 'error': 'Name and phone number are required'}), 400
         
-        connection = DatabaseManager.get_connection()
+        connection = DatabaseManager.request_connection()
         if not connection:
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
         
@@ -2289,7 +3234,6 @@ def book_appointment(appointment_id: int):
                 
         finally:
             cursor.close()
-            connection.close()
         
     except Exception as e:
         logger.error(f"Book appointment error: {e}")
@@ -2301,7 +3245,7 @@ def book_appointment(appointment_id: int):
 def generate_appointment_slots(route_location_id: int):
     """Generate appointment slots for a route location"""
     try:
-        connection = DatabaseManager.get_connection()
+        connection = DatabaseManager.request_connection()
         if not connection:
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
         
@@ -2329,7 +3273,6 @@ def generate_appointment_slots(route_location_id: int):
                 
         finally:
             cursor.close()
-            connection.close()
         
     except Exception as e:
         logger.error(f"Generate appointment slots error: {e}")
@@ -2355,7 +3298,7 @@ def publish_upcoming_slots():
         # Default 30 days window
         date_to = data.get('date_to') or (today + timedelta(days=30)).isoformat()
 
-        connection = DatabaseManager.get_connection()
+        connection = DatabaseManager.request_connection()
         if not connection:
             return jsonify({'success': False, 'error': 'Database connection failed'}), 500
 
@@ -2366,9 +3309,11 @@ def publish_upcoming_slots():
 
         try:
             cursor = connection.cursor(dictionary=True)
-            # Find active route locations in window
+            # Find active route locations in window, flagging those that already
+            # have slots in the same query (semi-join on the appointments index)
             rl_query = """
-                SELECT rl.id
+                SELECT rl.id,
+                       EXISTS (SELECT 1 FROM appointments a WHERE a.route_location_id = rl.id) AS has_slots
                 FROM route_locations rl
                 JOIN routes r ON rl.route_id = r.id
                 WHERE r.is_active = TRUE
@@ -2380,15 +3325,8 @@ def publish_upcoming_slots():
             for row in rl_rows:
                 rl_id = int(row['id'])
                 checked += 1
-                # Check if slots already exist
-                cursor2 = connection.cursor()
-                try:
-                    cursor2.execute("SELECT COUNT(*) FROM appointments WHERE route_location_id = %s", (rl_id,))
-                    count = cursor2.fetchone()[0]
-                finally:
-                    cursor2.close()
 
-                if count and int(count) > 0:
+                if row['has_slots']:
                     already_had += 1
                     continue
 
@@ -2419,7 +3357,6 @@ def publish_upcoming_slots():
             }), 200
         finally:
             cursor.close()
-            connection.close()
     except Exception as e:
         logger.error(f"Publish upcoming slots error: {e}")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
@@ -2428,6 +3365,98 @@ def publish_upcoming_slots():
 # ENHANCED INVENTORY MANAGEMENT
 # ============================================================================
 
+STOCK_ADJUSTMENT_TYPES = frozenset({'increase', 'decrease', 'set'})
+
+# Inventory report payloads, keyed by report parameters plus the inventory
+# data version. The version is a row in inventory_data_version (migration 17)
+# that triggers on the inventory tables bump in the same transaction as every
+# write, so all workers see a stock change on their next report request and a
+# report is never served from before it; the TTL only bounds memory.
+REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 300))
+REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE', 256))
+
+INVENTORY_VERSION_QUERY = "SELECT version FROM inventory_data_version WHERE id = 1"
+
+_report_cache = TTLCache(maxsize=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL)
+_report_cache_lock = threading.Lock()
+
+def report_cache_key(*parts) -> Optional[tuple]:
+    """Key for a report computed from the current inventory data version,
+    or None (do not cache) when the version cannot be read"""
+    # Read from the primary: a lagging replica would hand out an old version
+    row = DatabaseManager.execute_one(INVENTORY_VERSION_QUERY, (), ('version',))
+    if row is None:
+        return None
+    return parts + (row['version'],)
+
+def report_etag(key: tuple) -> str:
+    """ETag for a report key.
+
+    The key ends with the shared inventory data version, so every worker
+    derives the same tag for the same data, and it stops matching as soon as
+    a write bumps the version (or, for the turnover report, the day changes).
+    """
+    return hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+
+def cached_report_response(key: Optional[tuple]):
+    """304 or the cached report for key, or None when it must be computed.
+
+    A client's tag is checked before the local cache, so a worker that has
+    not cached this report yet can still answer 304 from the version alone.
+    """
+    if key is None:
+        return None
+    etag = report_etag(key)
+    if request.if_none_match.contains_weak(etag):
+        return report_response(None, etag)
+    with _report_cache_lock:
+        report = _report_cache.get(key)
+    return report_response(report, etag) if report is not None else None
+
+def set_cached_report(key: Optional[tuple], report: Dict) -> Optional[str]:
+    """Cache a report and return its ETag"""
+    if key is None:
+        return None
+    with _report_cache_lock:
+        _report_cache[key] = report
+    return report_etag(key)
+
+def report_response(report: Optional[Dict], etag: Optional[str] = None):
+    """Send a report, or 304 Not Modified when the client already holds this version"""
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = iso_jsonify({'success': True, 'data': report})
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        # Revalidate every time: a stock change must show up on the next load
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Asset categories are reference data seeded by migration and never edited
+# through the API, so the category -> calibration frequency map is loaded
+# once per ASSET_CATEGORY_CACHE_TTL instead of queried per asset write.
+ASSET_CATEGORY_CACHE_TTL = int(os.environ.get('ASSET_CATEGORY_CACHE_TTL', 300))
+
+_asset_category_cache = TTLCache(maxsize=1, ttl=ASSET_CATEGORY_CACHE_TTL)
+_asset_category_cache_lock = threading.Lock()
+
+def get_calibration_frequencies() -> Dict[int, Optional[int]]:
+    """Map of asset category id -> calibration_frequency_months"""
+    with _asset_category_cache_lock:
+        frequencies = _asset_category_cache.get('frequencies')
+    if frequencies is None:
+        rows = DatabaseManager.execute_query(
+            "SELECT id, calibration_frequency_months FROM asset_categories",
+            fetch=True
+        )
+        if rows is None:
+            return {}
+        frequencies = {row['id']: row['calibration_frequency_months'] for row in rows}
+        with _asset_category_cache_lock:
+            _asset_category_cache['frequencies'] = frequencies
+    return frequencies
+
 @app.route('/api/inventory/assets', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse', 'clerk'])
@@ -2490,10 +3519,10 @@ def get_assets():
         
         assets = DatabaseManager.execute_query(query, tuple(params), fetch=True)
         
-        return jsonify({
+        return iso_jsonify({
             'success': True,
             'data': {
-                'assets': _to_jsonable(assets) or []
+                'assets': assets or []
             }
         }), 200
         
@@ -2534,13 +3563,11 @@ def create_asset():
         # Set next maintenance date based on category if not provided
         next_maintenance = data.get('next_maintenance_date')
         if not next_maintenance and data.get('purchase_date'):
-            category_info = DatabaseManager.execute_query(
-                "SELECT calibration_frequency_months FROM asset_categories WHERE id = %s",
-                (data['category_id'],),
-                fetch=True
-            )
-            if category_info and category_info[0]['calibration_frequency_months']:
-                frequency = category_info[0]['calibration_frequency_months']
+            try:
+                frequency = get_calibration_frequencies().get(int(data['category_id']))
+            except (TypeError, ValueError):
+                frequency = None
+            if frequency:
                 purchase_date = datetime.strptime(data['purchase_date'], '%Y-%m-%d')
                 next_maintenance = (purchase_date + timedelta(days=frequency * 30)).strftime('%Y-%m-%d')
 
@@ -2550,7 +3577,7 @@ def create_asset():
             purchase_date, warranty_expiry, status, location, assigned_to,
             purchase_cost, current_value, maintenance_notes, next_maintenance_date,
             created_at, updated_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP(), UTC_TIMESTAMP())
         """
         
         result = DatabaseManager.execute_query(insert_query, (
@@ -2568,9 +3595,7 @@ def create_asset():
             data.get('purchase_cost', 0),
             data.get('current_value', data.get('purchase_cost', 0)),
             data.get('maintenance_notes'),
-            next_maintenance,
-            datetime.now(timezone.utc),
-            datetime.now(timezone.utc)
+            next_maintenance
         ))
         
         if result:
@@ -2611,8 +3636,7 @@ def update_asset(asset_id):
         if not update_fields:
             return jsonify({'success': False, 'error': 'No fields to update'}), 400
         
-        update_fields.append("updated_at = %s")
-        params.append(datetime.now(timezone.utc))
+        update_fields.append("updated_at = UTC_TIMESTAMP()")
         params.append(asset_id)
         
         update_query = f"UPDATE assets SET {', '.join(update_fields)} WHERE id = %s"
@@ -2645,39 +3669,31 @@ def record_asset_maintenance(asset_id):
         if not maintenance_notes:
             return jsonify({'success': False, 'error': 'Maintenance notes are required'}), 400
         
-        # Get asset category to calculate next maintenance if not provided
-        if not next_maintenance_date:
-            asset_info = DatabaseManager.execute_query(
-                """
-                SELECT ac.calibration_frequency_months 
-                FROM assets a 
-                JOIN asset_categories ac ON a.category_id = ac.id 
-                WHERE a.id = %s
-                """,
-                (asset_id,),
-                fetch=True
-            )
-            if asset_info and asset_info[0]['calibration_frequency_months']:
-                frequency = asset_info[0]['calibration_frequency_months']
-                maint_date = datetime.strptime(maintenance_date, '%Y-%m-%d')
-                next_maintenance_date = (maint_date + timedelta(days=frequency * 30)).strftime('%Y-%m-%d')
+        try:
+            datetime.strptime(maintenance_date, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'maintenance_date must be in YYYY-MM-DD format'}), 400
         
-        # Update asset maintenance record
+        # Update asset maintenance record; when next_maintenance_date is not
+        # provided it is derived from the asset's category in the same statement
         update_query = """
-        UPDATE assets 
-        SET last_maintenance_date = %s, 
-            next_maintenance_date = %s,
-            maintenance_notes = %s,
-            status = CASE WHEN status = 'Maintenance Required' THEN 'Operational' ELSE status END,
-            updated_at = %s
-        WHERE id = %s
+        UPDATE assets a
+        LEFT JOIN asset_categories ac ON a.category_id = ac.id
+        SET a.last_maintenance_date = %s, 
+            a.next_maintenance_date = COALESCE(
+                %s, DATE_ADD(%s, INTERVAL NULLIF(ac.calibration_frequency_months, 0) * 30 DAY)
+            ),
+            a.maintenance_notes = %s,
+            a.status = CASE WHEN a.status = 'Maintenance Required' THEN 'Operational' ELSE a.status END,
+            a.updated_at = UTC_TIMESTAMP()
+        WHERE a.id = %s
         """
         
         result = DatabaseManager.execute_query(update_query, (
             maintenance_date,
-            next_maintenance_date,
+            next_maintenance_date or None,
+            maintenance_date,
             maintenance_notes,
-            datetime.now(timezone.utc),
             asset_id
         ))
         
@@ -2828,15 +3844,16 @@ def get_consumables():
             query += " HAVING " + " AND ".join(having_conditions)
         
         query += " ORDER BY c.item_name"
-        
-        consumables = DatabaseManager.execute_query(query, tuple(params), fetch=True)
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'consumables': _to_jsonable(consumables) or []
-            }
-        }), 200
+
+        # The catalogue is unpaginated and grows with every SKU; stream it from
+        # a server-side cursor instead of building the full list and its JSON
+        consumables = DatabaseManager.iter_query(query, tuple(params), fetch_size=STREAM_CHUNK_ROWS)
+
+        return Response(
+            stream_with_context(stream_json_data('consumables', consumables, dumps=iso_json_dumps)),
+            status=200,
+            mimetype='application/json'
+        )
         
     except Exception as e:
         logger.error(f"Get consumables error: {e}")
@@ -2866,10 +3883,10 @@ def get_consumable_batches(consumable_id):
         
         batches = DatabaseManager.execute_query(query, (consumable_id,), fetch=True)
         
-        return jsonify({
+        return iso_jsonify({
             'success': True,
             'data': {
-                'batches': _to_jsonable(batches) or []
+                'batches': batches or []
             }
         }), 200
         
@@ -2912,7 +3929,7 @@ def create_consumable():
             item_code, item_name, category_id, generic_name, strength, dosage_form,
             unit_of_measure, reorder_level, max_stock_level, storage_temperature_min,
             storage_temperature_max, is_controlled_substance, created_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP())
         """
         
         result = DatabaseManager.execute_query(insert_query, (
@@ -2927,8 +3944,7 @@ def create_consumable():
             data.get('max_stock_level', 1000),
             data.get('storage_temperature_min'),
             data.get('storage_temperature_max'),
-            data.get('is_controlled_substance', False),
-            datetime.now(timezone.utc)
+            data.get('is_controlled_substance', False)
         ))
         
         if result:
@@ -3063,7 +4079,7 @@ def receive_inventory_stock():
             consumable_id, batch_number, supplier_id, quantity_received, quantity_current,
             unit_cost, manufacture_date, expiry_date, received_date, received_by, 
             location, status, created_at, updated_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Active', %s, %s)
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Active', UTC_TIMESTAMP(), UTC_TIMESTAMP())
         """
         
         result = DatabaseManager.execute_query(insert_query, (
@@ -3077,9 +4093,7 @@ def receive_inventory_stock():
             data['expiry_date'],
             data.get('received_date', datetime.now().strftime('%Y-%m-%d')),
             request.current_user['id'],
-            data.get('location', 'Mobile Clinic'),
-            datetime.now(timezone.utc),
-            datetime.now(timezone.utc)
+            data.get('location', 'Mobile Clinic')
         ))
         
         if result:
@@ -3112,7 +4126,7 @@ def adjust_inventory_stock(stock_id):
                 'error': 'adjustment_type and quantity are required'
             }), 400
             
-        if adjustment_type not in ['increase', 'decrease', 'set']:
+        if adjustment_type not in STOCK_ADJUSTMENT_TYPES:
             return jsonify({
                 'success': False, 
                 'error': 'adjustment_type must be increase, decrease, or set'
@@ -3153,29 +4167,17 @@ def adjust_inventory_stock(stock_id):
 
         # Update stock
         update_result = DatabaseManager.execute_query(
-            "UPDATE inventory_stock SET quantity_current = %s, updated_at = %s WHERE id = %s",
-            (new_quantity, datetime.now(timezone.utc), stock_id)
+            "UPDATE inventory_stock SET quantity_current = %s, updated_at = UTC_TIMESTAMP() WHERE id = %s",
+            (new_quantity, stock_id)
         )
         
         if update_result:
             # Log the adjustment
-            try:
-                log_query = """
-                INSERT INTO audit_log (user_id, table_name, record_id, action, old_values, new_values, created_at)
-                VALUES (%s, 'inventory_stock', %s, 'UPDATE', %s, %s, %s)
-                """
-                old_values = json.dumps({'quantity_current': current_quantity, 'reason': 'stock_adjustment'})
-                new_values = json.dumps({'quantity_current': new_quantity, 'adjustment_type': adjustment_type, 'reason': reason})
-                
-                DatabaseManager.execute_query(log_query, (
-                    request.current_user['id'],
-                    stock_id,
-                    old_values,
-                    new_values,
-                    datetime.now(timezone.utc)
-                ))
-            except Exception as log_error:
-                logger.warning(f"Failed to log stock adjustment: {log_error}")
+            audit_log(
+                request.current_user['id'], 'inventory_stock', 'UPDATE', record_id=stock_id,
+                old_values={'quantity_current': current_quantity, 'reason': 'stock_adjustment'},
+                new_values={'quantity_current': new_quantity, 'adjustment_type': adjustment_type, 'reason': reason}
+            )
             
             return jsonify({
                 'success': True,
@@ -3208,80 +4210,101 @@ def record_inventory_usage():
                 'error': 'consumable_id and valid quantity_used are required'
             }), 400
 
-        # Get available stock using FIFO (First In, First Out) - earliest expiry first
-        available_stock = DatabaseManager.execute_query(
-            """
-            SELECT id, quantity_current, batch_number, expiry_date
-            FROM inventory_stock
-            WHERE consumable_id = %s AND status = 'Active' AND quantity_current > 0
-            ORDER BY expiry_date ASC, received_date ASC
-            """,
-            (consumable_id,),
-            fetch=True
-        )
-        
-        if not available_stock:
-            return jsonify({
-                'success': False, 
-                'error': 'No stock available for this consumable'
-            }), 400
-        
-        # Check total available quantity
-        total_available = sum(stock['quantity_current'] for stock in available_stock)
-        if total_available < quantity_used:
-            return jsonify({
-                'success': False, 
-                'error': f'Insufficient stock. Available: {total_available}, Requested: {quantity_used}'
-            }), 400
-        
-        # Process usage across batches using FIFO
-        remaining_to_use = quantity_used
-        usage_records = []
-        
-        for stock in available_stock:
-            if remaining_to_use <= 0:
-                break
-                
-            stock_id = stock['id']
-            available_in_batch = stock['quantity_current']
-            
-            # Use as much as possible from this batch
-            quantity_from_batch = min(remaining_to_use, available_in_batch)
-            
-            # Update stock quantity
-            new_quantity = available_in_batch - quantity_from_batch
-            DatabaseManager.execute_query(
-                "UPDATE inventory_stock SET quantity_current = %s, updated_at = %s WHERE id = %s",
-                (new_quantity, datetime.now(timezone.utc), stock_id)
-            )
-            
-            # Record usage
-            DatabaseManager.execute_query(
+        # Stock reads, batch updates and usage rows run in one transaction on one
+        # connection; the batch rows are locked so concurrent usage cannot
+        # draw the same stock twice.
+        with DatabaseManager.pooled_cursor(commit=True) as cursor:
+            # Get available stock using FIFO (First In, First Out) - earliest expiry first
+            cursor.execute(
                 """
-                INSERT INTO inventory_usage 
-                (stock_id, visit_id, quantity_used, used_by, usage_date, usage_time, location, notes, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                SELECT id, quantity_current, batch_number, expiry_date
+                FROM inventory_stock
+                WHERE consumable_id = %s AND status = 'Active' AND quantity_current > 0
+                ORDER BY expiry_date ASC, received_date ASC
+                FOR UPDATE
                 """,
-                (
+                (consumable_id,)
+            )
+            available_stock = cursor.fetchall()
+
+            if not available_stock:
+                return jsonify({
+                    'success': False, 
+                    'error': 'No stock available for this consumable'
+                }), 400
+
+            # Check total available quantity
+            total_available = sum(stock['quantity_current'] for stock in available_stock)
+            if total_available < quantity_used:
+                return jsonify({
+                    'success': False, 
+                    'error': f'Insufficient stock. Available: {total_available}, Requested: {quantity_used}'
+                }), 400
+
+            # Work out usage across batches using FIFO
+            remaining_to_use = quantity_used
+            usage_records = []
+            stock_updates = []
+            usage_rows = []
+            now = datetime.now()
+            usage_date = now.strftime('%Y-%m-%d')
+            usage_time = now.strftime('%H:%M:%S')
+
+            for stock in available_stock:
+                if remaining_to_use <= 0:
+                    break
+
+                stock_id = stock['id']
+                available_in_batch = stock['quantity_current']
+
+                # Use as much as possible from this batch
+                quantity_from_batch = min(remaining_to_use, available_in_batch)
+                new_quantity = available_in_batch - quantity_from_batch
+
+                stock_updates.append((stock_id, new_quantity))
+                usage_rows.append((
                     stock_id,
                     visit_id,
                     quantity_from_batch,
                     request.current_user['id'],
-                    datetime.now().strftime('%Y-%m-%d'),
-                    datetime.now().strftime('%H:%M:%S'),
+                    usage_date,
+                    usage_time,
                     location,
-                    notes,
-                    datetime.now(timezone.utc)
-                )
+                    notes
+                ))
+                usage_records.append({
+                    'batch_number': stock['batch_number'],
+                    'quantity_used': quantity_from_batch,
+                    'remaining_in_batch': new_quantity
+                })
+
+                remaining_to_use -= quantity_from_batch
+
+            # Record usage as one multi-row INSERT, before the stock is drawn
+            # down: tr_validate_inventory_usage checks each row against the
+            # batch's current quantity, which must still be the pre-draw one
+            cursor.executemany(
+                """
+                INSERT INTO inventory_usage 
+                (stock_id, visit_id, quantity_used, used_by, usage_date, usage_time, location, notes, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP())
+                """,
+                usage_rows
+            )
+
+            # Then update all touched batches in one statement
+            case_sql = ' '.join(['WHEN %s THEN %s'] * len(stock_updates))
+            id_placeholders = ','.join(['%s'] * len(stock_updates))
+            update_params = [value for pair in stock_updates for value in pair]
+            update_params.extend(stock_id for stock_id, _ in stock_updates)
+            cursor.execute(
+                f"""
+                UPDATE inventory_stock
+                SET quantity_current = CASE id {case_sql} END, updated_at = UTC_TIMESTAMP()
+                WHERE id IN ({id_placeholders})
+                """,
+                tuple(update_params)
             )
-            
-            usage_records.append({
-                'batch_number': stock['batch_number'],
-                'quantity_used': quantity_from_batch,
-                'remaining_in_batch': new_quantity
-            })
-            
-            remaining_to_use -= quantity_from_batch
         
         return jsonify({
             'success': True,
@@ -3299,6 +4322,7 @@ def record_inventory_usage():
 @app.route('/api/inventory/usage/history', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse', 'clerk'])
+@read_only
 def get_usage_history():
     """Get inventory usage history with filtering"""
     try:
@@ -3309,6 +4333,7 @@ def get_usage_history():
         visit_id = request.args.get('visit_id')
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * limit
         
@@ -3348,6 +4373,44 @@ def get_usage_history():
         if visit_id:
             query += " AND iu.visit_id = %s"
             params.append(visit_id)
+
+        order_by = " ORDER BY iu.usage_date DESC, iu.usage_time DESC, iu.id DESC LIMIT %s"
+
+        def next_cursor(row):
+            return encode_page_cursor(row['usage_date'], row['usage_time'], row['id'])
+
+        if cursor:
+            # Keyset page: seek past the previous page's last row instead of
+            # counting and skipping OFFSET rows, and stream the page as it is read
+            last = decode_page_cursor(cursor, 3)
+            if last is None:
+                return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+            last_date, last_time, last_id = last
+            query += """
+            AND iu.usage_date <= %s
+            AND (iu.usage_date < %s OR iu.usage_time < %s OR (iu.usage_time = %s AND iu.id < %s))
+            """
+            params.extend([last_date, last_date, last_time, last_time, last_id, limit])
+
+            pagination = {'limit': limit, 'next_cursor': None}
+
+            def tracked(rows):
+                count = 0
+                for row in rows:
+                    count += 1
+                    if count == limit:
+                        pagination['next_cursor'] = next_cursor(row)
+                    yield row
+
+            rows = DatabaseManager.iter_query(query + order_by, tuple(params), readonly=True,
+                                              fetch_size=STREAM_CHUNK_ROWS)
+            return Response(
+                stream_with_context(stream_json_data('usage_history', tracked(rows),
+                                                     lambda: {'pagination': pagination},
+                                                     dumps=iso_json_dumps)),
+                status=200,
+                mimetype='application/json'
+            )
         
         # Get total count
         count_query = f"SELECT COUNT(*) as total FROM ({query}) as usage_count"
@@ -3355,20 +4418,22 @@ def get_usage_history():
         total = total_result[0]['total'] if total_result else 0
         
         # Add pagination
-        query += " ORDER BY iu.usage_date DESC, iu.usage_time DESC LIMIT %s OFFSET %s"
+        query += order_by + " OFFSET %s"
         params.extend([limit, offset])
         
-        usage_history = DatabaseManager.execute_query(query, tuple(params), fetch=True)
+        usage_history = DatabaseManager.execute_query(query, tuple(params), fetch=True) or []
         
-        return jsonify({
+        return iso_jsonify({
             'success': True,
             'data': {
-                'usage_history': _to_jsonable(usage_history) or [],
+                'usage_history': usage_history,
                 'pagination': {
                     'page': page,
                     'limit': limit,
                     'total': total,
-                    'pages': (total + limit - 1) // limit
+                    'pages': (total + limit - 1) // limit,
+                    # Clients can continue from here with ?cursor= instead of ?page=
+                    'next_cursor': next_cursor(usage_history[-1]) if len(usage_history) == limit else None
                 }
             }
         }), 200
@@ -3409,10 +4474,10 @@ def get_suppliers():
         
         suppliers = DatabaseManager.execute_query(query, tuple(params), fetch=True)
         
-        return jsonify({
+        return iso_jsonify({
             'success': True,
             'data': {
-                'suppliers': _to_jsonable(suppliers) or []
+                'suppliers': suppliers or []
             }
         }), 200
         
@@ -3453,7 +4518,7 @@ def create_supplier():
         insert_query = """
         INSERT INTO suppliers (
             supplier_name, contact_person, phone, email, address, tax_number, is_active, created_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP())
         """
         
         result = DatabaseManager.execute_query(insert_query, (
@@ -3463,8 +4528,7 @@ def create_supplier():
             data.get('email'),
             data.get('address'),
             data.get('tax_number'),
-            data.get('is_active', True),
-            datetime.now(timezone.utc)
+            data.get('is_active', True)
         ))
         
         if result:
@@ -3523,11 +4587,59 @@ def update_supplier(supplier_id):
 @app.route('/api/inventory/alerts/expiry', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse'])
+@read_only
 def get_expiry_alerts():
     """Get inventory expiry alerts"""
     try:
         days_ahead = int(request.args.get('days_ahead', 90))
         alert_level = request.args.get('alert_level', '')  # 'expired', 'critical', 'warning'
+        include_items = request.args.get('include_items', 'true').lower() not in ('0', 'false', 'no')
+
+        where = """
+        WHERE ist.status = 'Active' 
+        AND ist.quantity_current > 0
+        AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+        """
+        
+        params = [days_ahead]
+        
+        if alert_level:
+            if alert_level == 'expired':
+                where += " AND ist.expiry_date <= CURDATE()"
+            elif alert_level == 'critical':
+                where += " AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 7 DAY) AND ist.expiry_date > CURDATE()"
+            elif alert_level == 'warning':
+                where += " AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY) AND ist.expiry_date > DATE_ADD(CURDATE(), INTERVAL 7 DAY)"
+
+        if not include_items:
+            # Summary only: aggregated in the database, no rows transferred
+            totals = DatabaseManager.execute_query(
+                """
+                SELECT COUNT(*) AS total_alerts,
+                       COALESCE(SUM(ist.expiry_date <= CURDATE()), 0) AS expired,
+                       COALESCE(SUM(ist.expiry_date > CURDATE()
+                                    AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 7 DAY)), 0) AS critical,
+                       COALESCE(SUM(ist.expiry_date > DATE_ADD(CURDATE(), INTERVAL 7 DAY)
+                                    AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)), 0) AS warning,
+                       COALESCE(SUM(ist.quantity_current * ist.unit_cost), 0) AS total_value_at_risk
+                FROM inventory_stock ist
+                """ + where,
+                tuple(params),
+                fetch=True
+            )
+            totals = totals[0] if totals else {}
+            return jsonify({
+                'success': True,
+                'data': {
+                    'summary': {
+                        'total_alerts': int(totals.get('total_alerts') or 0),
+                        'expired': int(totals.get('expired') or 0),
+                        'critical': int(totals.get('critical') or 0),
+                        'warning': int(totals.get('warning') or 0),
+                        'total_value_at_risk': float(totals.get('total_value_at_risk') or 0)
+                    }
+                }
+            }), 200
         
         query = """
         SELECT ist.id as stock_id,
@@ -3550,48 +4662,35 @@ def get_expiry_alerts():
         JOIN consumables c ON ist.consumable_id = c.id
         LEFT JOIN consumable_categories cc ON c.category_id = cc.id
         LEFT JOIN suppliers s ON ist.supplier_id = s.id
-        WHERE ist.status = 'Active' 
-        AND ist.quantity_current > 0
-        AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
-        """
-        
-        params = [days_ahead]
-        
-        if alert_level:
-            if alert_level == 'expired':
-                query += " AND ist.expiry_date <= CURDATE()"
-            elif alert_level == 'critical':
-                query += " AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 7 DAY) AND ist.expiry_date > CURDATE()"
-            elif alert_level == 'warning':
-                query += " AND ist.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY) AND ist.expiry_date > DATE_ADD(CURDATE(), INTERVAL 7 DAY)"
-        
-        query += " ORDER BY ist.expiry_date ASC, c.item_name ASC"
-        
-        alerts = DatabaseManager.execute_query(query, tuple(params), fetch=True)
+        """ + where + " ORDER BY ist.expiry_date ASC, c.item_name ASC"
         
-        # Summary statistics
+        # Summary counters are accumulated as rows stream past, so neither the
+        # alert list nor its JSON is ever held in memory in full
         summary = {
-            'total_alerts': len(alerts) if alerts else 0,
+            'total_alerts': 0,
             'expired': 0,
             'critical': 0,
             'warning': 0,
             'total_value_at_risk': 0
         }
-        
-        if alerts:
+
+        def counted(alerts):
             for alert in alerts:
+                summary['total_alerts'] += 1
                 level = alert['alert_level']
                 if level in summary:
                     summary[level] += 1
                 summary['total_value_at_risk'] += float(alert['total_value'] or 0)
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'alerts': _to_jsonable(alerts) or [],
-                'summary': summary
-            }
-        }), 200
+                yield alert
+
+        alerts = DatabaseManager.iter_query(query, tuple(params), readonly=True, fetch_size=STREAM_CHUNK_ROWS)
+
+        return Response(
+            stream_with_context(stream_json_data('alerts', counted(alerts), lambda: {'summary': summary},
+                                                 dumps=iso_json_dumps)),
+            status=200,
+            mimetype='application/json'
+        )
         
     except Exception as e:
         logger.error(f"Get expiry alerts error: {e}")
@@ -3600,6 +4699,7 @@ def get_expiry_alerts():
 @app.route('/api/inventory/alerts/stock', methods=['GET'])
 @token_required
 @role_required(['administrator', 'doctor', 'nurse'])
+@read_only
 def get_stock_alerts():
     """Get low stock alerts"""
     try:
@@ -3640,10 +4740,10 @@ def get_stock_alerts():
                 if level in summary:
                     summary[level] += 1
         
-        return jsonify({
+        return iso_jsonify({
             'success': True,
             'data': {
-                'alerts': _to_jsonable(alerts) or [],
+                'alerts': alerts or [],
                 'summary': summary
             }
         }), 200
@@ -3688,40 +4788,49 @@ def get_inventory_valuation():
         GROUP BY c.id, cc.category_name
         ORDER BY cc.category_name, c.item_name
         """
+
+        cache_key = report_cache_key('valuation', category_id, include_expired)
+        cached = cached_report_response(cache_key)
+        if cached is not None:
+            return cached
         
-        valuation_data = DatabaseManager.execute_query(query, tuple(params), fetch=True)
-        
-        # Calculate totals
-        total_value = sum(float(item['total_value'] or 0) for item in valuation_data) if valuation_data else 0
-        total_items = len(valuation_data) if valuation_data else 0
+        rows = DatabaseManager.execute_query(query, tuple(params), fetch=True)
         
-        # Group by category for summary
+        valuation_data = rows or []
+
+        # Totals and per-category summary in a single pass over the rows
+        total_value = 0
         category_summary = {}
-        if valuation_data:
-            for item in valuation_data:
-                category = item['category_name'] or 'Uncategorized'
-                if category not in category_summary:
-                    category_summary[category] = {
-                        'item_count': 0,
-                        'total_value': 0,
-                        'total_quantity': 0
-                    }
-                category_summary[category]['item_count'] += 1
-                category_summary[category]['total_value'] += float(item['total_value'] or 0)
-                category_summary[category]['total_quantity'] += int(item['total_quantity'] or 0)
+        for item in valuation_data:
+            item_value = float(item['total_value'] or 0)
+            total_value += item_value
+
+            category = item['category_name'] or 'Uncategorized'
+            summary = category_summary.get(category)
+            if summary is None:
+                summary = category_summary[category] = {
+                    'item_count': 0,
+                    'total_value': 0,
+                    'total_quantity': 0
+                }
+            summary['item_count'] += 1
+            summary['total_value'] += item_value
+            summary['total_quantity'] += int(item['total_quantity'] or 0)
+        total_items = len(valuation_data)
+
+        report = {
+            'items': valuation_data,
+            'summary': {
+                'total_value': total_value,
+                'total_items': total_items,
+                'category_breakdown': category_summary
+            },
+            'generated_at': datetime.now(timezone.utc).isoformat()
+        }
+        # A failed query is reported as empty but not cached
+        etag = set_cached_report(cache_key, report) if rows is not None else None
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'items': _to_jsonable(valuation_data) or [],
-                'summary': {
-                    'total_value': total_value,
-                    'total_items': total_items,
-                    'category_breakdown': category_summary
-                },
-                'generated_at': datetime.now(timezone.utc).isoformat()
-            }
-        }), 200
+        return report_response(report, etag)
         
     except Exception as e:
         logger.error(f"Get inventory valuation error: {e}")
@@ -3768,17 +4877,23 @@ def get_inventory_turnover():
         HAVING total_used > 0
         ORDER BY annualized_turnover_ratio DESC
         """
+
+        # Usage dates are relative to CURDATE(), so the day is part of the key
+        cache_key = report_cache_key('turnover', period_months, category_id, date.today())
+        cached = cached_report_response(cache_key)
+        if cached is not None:
+            return cached
         
         turnover_data = DatabaseManager.execute_query(query, tuple(params), fetch=True)
+
+        report = {
+            'turnover_analysis': turnover_data or [],
+            'period_months': period_months,
+            'generated_at': datetime.now(timezone.utc).isoformat()
+        }
+        etag = set_cached_report(cache_key, report) if turnover_data is not None else None
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'turnover_analysis': _to_jsonable(turnover_data) or [],
-                'period_months': period_months,
-                'generated_at': datetime.now(timezone.utc).isoformat()
-            }
-        }), 200
+        return report_response(report, etag)
         
     except Exception as e:
         logger.error(f"Get inventory turnover error: {e}")
@@ -3788,12 +4903,196 @@ def get_inventory_turnover():
 # OFFLINE SYNC CAPABILITIES
 # ============================================================================
 
+# Upper bound on records accepted in one sync upload. Devices with a larger
+# backlog send it in several requests, so one client cannot make the server
+# build an unbounded batch in memory.
+SYNC_MAX_RECORDS = int(os.environ.get('SYNC_MAX_RECORDS', 1000))
+
+# Tables a device may report offline changes for, and the operation_type ENUM
+# of sync_status. Records outside these, or without a positive integer
+# record_id and a parseable timestamp, are rejected up front: one invalid
+# row would otherwise fail the whole multi-row INSERT.
+SYNCABLE_TABLES = frozenset({
+    'patients', 'patient_visits', 'vital_signs', 'clinical_notes',
+    'visit_workflow_progress', 'appointments', 'inventory_usage', 'referrals',
+})
+SYNC_OPERATION_TYPES = frozenset({'INSERT', 'UPDATE', 'DELETE'})
+
+SYNC_UPSERT_QUERY = """
+INSERT INTO sync_status (
+    table_name, record_id, operation_type, sync_status,
+    device_id, user_id, local_timestamp
+) VALUES (%s, %s, %s, 'Pending', %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    sync_status = 'Pending',
+    retry_count = retry_count + 1,
+    last_retry_at = NOW()
+"""
+
+# Validated uploads are queued whole and written by a background worker, so
+# the request returns 202 as soon as the batch is accepted. The worker folds
+# queued uploads into multi-row INSERTs of up to SYNC_WRITE_BATCH_ROWS rows.
+# Batch outcomes are kept for SYNC_BATCH_STATUS_TTL seconds for polling.
+SYNC_QUEUE_MAXSIZE = int(os.environ.get('SYNC_QUEUE_MAXSIZE', 1000))
+SYNC_WRITE_BATCH_ROWS = int(os.environ.get('SYNC_WRITE_BATCH_ROWS', 500))
+SYNC_BATCH_STATUS_TTL = int(os.environ.get('SYNC_BATCH_STATUS_TTL', 3600))
+# Rows of an upload the database still rejects after it is retried on its
+# own, or still queued when shutdown times out, are appended to this
+# JSON-lines file and fsynced; empty disables it.
+SYNC_SPOOL_PATH = os.environ.get('SYNC_SPOOL_PATH', '')
+# How long interpreter shutdown waits for the writer to drain accepted
+# uploads; whatever is still queued after that is spooled.
+SYNC_SHUTDOWN_TIMEOUT = float(os.environ.get('SYNC_SHUTDOWN_TIMEOUT', 10))
+
+_sync_queue = queue.Queue(maxsize=SYNC_QUEUE_MAXSIZE)
+_sync_batches = TTLCache(maxsize=10000, ttl=SYNC_BATCH_STATUS_TTL)
+_sync_batches_lock = threading.Lock()
+_sync_worker = None
+_sync_worker_lock = threading.Lock()
+
+def _set_sync_batch_status(batch_id: str, **status):
+    with _sync_batches_lock:
+        _sync_batches[batch_id] = dict(_sync_batches.get(batch_id, {}), **status)
+
+def _parse_sync_timestamp(value) -> Optional[datetime]:
+    """Device timestamp as a naive UTC datetime, or None if it is unusable.
+    Accepts epoch milliseconds (Date.now() on the client) or an ISO 8601 string."""
+    if isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            parsed = datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+        elif isinstance(value, str):
+            parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        else:
+            return None
+    except (ValueError, OverflowError, OSError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _parse_sync_record_id(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value > 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value) or None
+    return None
+
+def _spool_sync_rows(batch_id: str, rows: List[tuple]):
+    """Append an upload the database rejected to SYNC_SPOOL_PATH, one JSON array per row"""
+    if not SYNC_SPOOL_PATH:
+        return
+    try:
+        with open(SYNC_SPOOL_PATH, 'a', encoding='utf-8') as spool:
+            for row in rows:
+                spool.write(json.dumps([batch_id, *row], default=str) + '\n')
+            spool.flush()
+            os.fsync(spool.fileno())
+    except OSError as e:
+        logger.error(f"Failed to spool {len(rows)} sync records of batch {batch_id}: {e}")
+
+def _write_sync_uploads(uploads: List[tuple]):
+    """Write queued uploads with one executemany. If the merged group fails,
+    each upload is retried on its own so one bad upload does not fail the others."""
+    rows = [row for _, batch_rows in uploads for row in batch_rows]
+    if DatabaseManager.execute_many(SYNC_UPSERT_QUERY, rows) is not None:
+        for batch_id, _ in uploads:
+            _set_sync_batch_status(batch_id, status='completed')
+        return
+
+    if len(uploads) > 1:
+        logger.warning(f"Sync write of {len(rows)} records from {len(uploads)} uploads failed, retrying each upload")
+    for batch_id, batch_rows in uploads:
+        if len(uploads) > 1 and DatabaseManager.execute_many(SYNC_UPSERT_QUERY, batch_rows) is not None:
+            _set_sync_batch_status(batch_id, status='completed')
+            continue
+        logger.error(f"Sync write of {len(batch_rows)} records for batch {batch_id} failed")
+        _spool_sync_rows(batch_id, batch_rows)
+        _set_sync_batch_status(batch_id, status='failed')
+
+def _sync_writer():
+    """Drain queued uploads in groups of up to SYNC_WRITE_BATCH_ROWS rows.
+    A None sentinel writes the current group and stops the worker."""
+    while True:
+        upload = _sync_queue.get()
+        if upload is None:
+            return
+        uploads = [upload]
+        row_count = len(upload[1])
+        stopping = False
+        while row_count < SYNC_WRITE_BATCH_ROWS:
+            try:
+                upload = _sync_queue.get_nowait()
+            except queue.Empty:
+                break
+            if upload is None:
+                stopping = True
+                break
+            uploads.append(upload)
+            row_count += len(upload[1])
+
+        _write_sync_uploads(uploads)
+        if stopping:
+            return
+
+def _start_sync_writer():
+    global _sync_worker
+    with _sync_worker_lock:
+        if _sync_worker is None or not _sync_worker.is_alive():
+            if _sync_worker is None:
+                atexit.register(_stop_sync_writer)
+            _sync_worker = threading.Thread(target=_sync_writer, name='sync-writer', daemon=True)
+            _sync_worker.start()
+
+def _stop_sync_writer():
+    """Write accepted uploads at interpreter shutdown: the client was already
+    told 202, so anything the writer cannot reach in time is spooled"""
+    worker = _sync_worker
+    if worker is not None and worker.is_alive():
+        try:
+            _sync_queue.put(None, timeout=SYNC_SHUTDOWN_TIMEOUT)
+            worker.join(SYNC_SHUTDOWN_TIMEOUT)
+        except queue.Full:
+            pass
+        if worker.is_alive():
+            logger.warning("Sync writer did not finish draining before shutdown")
+
+    leftover = 0
+    while True:
+        try:
+            upload = _sync_queue.get_nowait()
+        except queue.Empty:
+            break
+        if upload is not None:
+            _spool_sync_rows(*upload)
+            leftover += 1
+    if leftover:
+        logger.warning(f"{leftover} accepted sync uploads were not written before shutdown"
+                       + (f" and were spooled to {SYNC_SPOOL_PATH}" if SYNC_SPOOL_PATH else ""))
+
 @app.route('/api/sync/status', methods=['GET'])
 @token_required
 def get_sync_status():
     """Get synchronization status for offline operations"""
     try:
         device_id = request.args.get('device_id')
+
+        batch_id = request.args.get('batch_id')
+        if batch_id:
+            with _sync_batches_lock:
+                batch = _sync_batches.get(batch_id)
+            if batch is None or batch['user_id'] != request.current_user['id']:
+                return jsonify({'success': False, 'error': 'Unknown or expired batch_id'}), 404
+            return jsonify({
+                'success': True,
+                'batch_id': batch_id,
+                'status': batch['status'],
+                'accepted_count': batch['accepted_count'],
+                'rejected_count': batch['rejected_count']
+            }), 200
         
         query = """
         SELECT 
@@ -3837,43 +5136,70 @@ def sync_pending_records():
         
         if not device_id or not records:
             return jsonify({'success': False, 'error': 'device_id and records are required'}), 400
+
+        if not isinstance(records, list):
+            return jsonify({'success': False, 'error': 'records must be a list'}), 400
+
+        if len(records) > SYNC_MAX_RECORDS:
+            logger.warning(f"Rejected sync upload of {len(records)} records from device {device_id}")
+            return jsonify({
+                'success': False,
+                'error': f'At most {SYNC_MAX_RECORDS} records can be synced per request'
+            }), 413
         
-        synced_count = 0
-        failed_count = 0
-        
+        user_id = request.current_user['id']
+        sync_rows = []
+        rejected_count = 0
         for record in records:
+            if not isinstance(record, dict):
+                rejected_count += 1
+                continue
+            table_name = record.get('table_name')
+            record_id = _parse_sync_record_id(record.get('record_id'))
+            local_timestamp = _parse_sync_timestamp(record.get('timestamp'))
+            if (table_name not in SYNCABLE_TABLES
+                    or record.get('operation_type') not in SYNC_OPERATION_TYPES
+                    or record_id is None or local_timestamp is None):
+                rejected_count += 1
+                continue
+            sync_rows.append((
+                table_name,
+                record_id,
+                record['operation_type'],
+                device_id,
+                user_id,
+                local_timestamp
+            ))
+
+        if rejected_count:
+            logger.warning(f"Rejected {rejected_count} invalid sync records from device {device_id}")
+
+        batch_id = str(uuid.uuid4())
+        batch_status = 'queued' if sync_rows else 'completed'
+        _set_sync_batch_status(
+            batch_id, user_id=user_id, status=batch_status,
+            accepted_count=len(sync_rows), rejected_count=rejected_count
+        )
+
+        # The whole upload is queued as one item; the writer thread does the insert
+        if sync_rows:
+            _start_sync_writer()
             try:
-                DatabaseManager.execute_query(
-                    """
-                    INSERT INTO sync_status (
-                        table_name, record_id, operation_type, sync_status,
-                        device_id, user_id, local_timestamp
-                    ) VALUES (%s, %s, %s, 'Pending', %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        sync_status = 'Pending',
-                        retry_count = retry_count + 1,
-                        last_retry_at = NOW()
-                    """,
-                    (
-                        record.get('table_name'),
-                        record.get('record_id'),
-                        record.get('operation_type'),
-                        device_id,
-                        request.current_user['id'],
-                        record.get('timestamp')
-                    )
-                )
-                synced_count += 1
-            except Exception as sync_error:
-                logger.error(f"Sync record error: {sync_error}")
-                failed_count += 1
+                _sync_queue.put_nowait((batch_id, sync_rows))
+            except queue.Full:
+                with _sync_batches_lock:
+                    _sync_batches.pop(batch_id, None)
+                logger.warning(f"Sync queue full, refusing {len(sync_rows)} records from device {device_id}")
+                return jsonify({'success': False, 'error': 'Sync service busy, retry shortly'}), 503
         
         return jsonify({
             'success': True,
-            'synced_count': synced_count,
-            'failed_count': failed_count,
-            'message': f'Synced {synced_count} records, {failed_count} failed'
-        }), 200
+            'status': 'accepted',
+            'batch_id': batch_id,
+            'accepted_count': len(sync_rows),
+            'failed_count': rejected_count,
+            'message': f'Accepted {len(sync_rows)} records for sync, {rejected_count} rejected'
+        }), 202
         
     except Exception as e:
         logger.error(f"Sync pending records error: {e}")
@@ -3895,7 +5221,12 @@ def palmed_member_lookup():
             return jsonify({'success': False, 'error': 'medical_aid_number is required'}), 400
         
         existing_patient = DatabaseManager.execute_query(
-            "SELECT * FROM patients WHERE medical_aid_number = %s",
+            """
+            SELECT id, medical_aid_number, first_name, last_name, date_of_birth, gender,
+                   member_type, is_palmed_member, phone_number, email, physical_address
+            FROM patients
+            WHERE medical_aid_number = %s
+            """,
             (medical_aid_number,),
             fetch=True
         )
@@ -3949,7 +5280,7 @@ def sync_palmed_member():
         
         # Get patient data
         patient = DatabaseManager.execute_query(
-            "SELECT * FROM patients WHERE id = %s",
+            "SELECT id, first_name, last_name FROM patients WHERE id = %s",
             (patient_id,),
             fetch=True
         )